@@ -0,0 +1,159 @@
+"""
+Lesson execution engine.
+
+Serves long-form lessons (see app.loaders.lesson_loader) one lesson, and
+one step, at a time:
+
+- A lesson module is reduced once per file version to a LessonIndex: the
+  validated outline, a lesson id -> position map and the table-of-contents
+  payload. Listing lessons never touches their steps.
+- A lesson's steps are validated and compiled (through the module
+  engine's `compile_steps`, so every registered step handler applies)
+  only when that lesson is first opened. Lessons stored in their own file
+  are read at that point; inline lessons are compiled from the outline.
+  Either way the result is cached until the file changes.
+- Steps are then served with `render_step`, as for scenario modules.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+from app.engines.module_engine import CompiledSteps, compile_steps
+from app.loaders.content_registry import registry
+from app.loaders.lesson_loader import lesson_file_path, lesson_module_path
+from app.metrics import timed_loader
+from app.models.content import LessonEntry, LessonModule, parse_lesson, parse_lesson_module
+
+
+@dataclass(frozen=True)
+class CompiledLesson:
+    """
+    One lesson, ready to serve.
+
+    Attributes:
+        id: Lesson id.
+        title: Lesson title.
+        steps: Compiled steps, rendered with `render_step`.
+    """
+
+    id: str
+    title: str
+    steps: CompiledSteps
+
+
+@dataclass(frozen=True)
+class LessonIndex:
+    """
+    Load-time lookup structure for a lesson module.
+
+    Attributes:
+        module: The validated outline (steps not yet compiled).
+        positions: Lesson id -> position in the outline.
+        toc: Table-of-contents payload, without the module id (the API
+            identifies lesson modules by file name; see routers/lessons.py).
+    """
+
+    module: LessonModule
+    positions: Mapping[str, int]
+    toc: dict
+    # Inline lessons compiled so far (lesson id -> CompiledLesson).
+    _inline: Dict[str, CompiledLesson] = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def entry(self, lesson_id: str) -> Optional[LessonEntry]:
+        position = self.positions.get(lesson_id)
+        return None if position is None else self.module.lessons[position]
+
+    def neighbours(self, lesson_id: str) -> tuple[Optional[str], Optional[str]]:
+        """Returns the (previous, next) lesson ids in outline order."""
+        position = self.positions[lesson_id]
+        lessons = self.module.lessons
+        previous = lessons[position - 1].id if position > 0 else None
+        following = lessons[position + 1].id if position + 1 < len(lessons) else None
+        return previous, following
+
+    def inline_lesson(self, entry: LessonEntry) -> CompiledLesson:
+        """Compiles an inline lesson on first use."""
+        compiled = self._inline.get(entry.id)
+        if compiled is None:
+            compiled = compile_lesson(
+                {"id": entry.id, "title": entry.title, "steps": entry.raw_steps},
+                where=f"lesson '{entry.id}'",
+            )
+            with self._lock:
+                compiled = self._inline.setdefault(entry.id, compiled)
+        return compiled
+
+
+def index_lessons(raw: Mapping) -> LessonIndex:
+    """
+    Builds a LessonIndex from a raw lesson module outline.
+
+    Raises:
+        ContentError: If the outline is malformed.
+    """
+    module = parse_lesson_module(raw)
+    toc = {
+        "title": module.title,
+        "description": module.description,
+        "lessons": [
+            {
+                "id": lesson.id,
+                "title": lesson.title,
+                "estimated_minutes": lesson.estimated_minutes,
+                "position": position,
+            }
+            for position, lesson in enumerate(module.lessons)
+        ],
+    }
+    positions = {lesson.id: position for position, lesson in enumerate(module.lessons)}
+    return LessonIndex(module=module, positions=positions, toc=toc)
+
+
+def compile_lesson(raw: Mapping, where: str = "lesson") -> CompiledLesson:
+    """
+    Validates one lesson and compiles its steps.
+
+    Raises:
+        ContentError: If the lesson is malformed.
+        ValueError: If a step has an unknown type.
+    """
+    lesson = parse_lesson(raw, where)
+    return CompiledLesson(id=lesson.id, title=lesson.title, steps=compile_steps(lesson.steps))
+
+
+@timed_loader("load_lesson_index")
+def load_lesson_index(module_id: str) -> LessonIndex:
+    """
+    Returns the outline index for a lesson module, built once per file version.
+
+    Raises:
+        FileNotFoundError: If the lesson module does not exist.
+    """
+    return registry.compiled(lesson_module_path(module_id), index_lessons)
+
+
+@timed_loader("aload_lesson_index")
+async def aload_lesson_index(module_id: str) -> LessonIndex:
+    """Async variant of `load_lesson_index()`."""
+    return await registry.acompiled(lesson_module_path(module_id), index_lessons)
+
+
+@timed_loader("aload_lesson")
+async def aload_lesson(index: LessonIndex, module_id: str, lesson_id: str) -> CompiledLesson:
+    """
+    Returns one compiled lesson, loading only that lesson's steps.
+
+    Raises:
+        KeyError: If the module has no such lesson.
+        FileNotFoundError: If the lesson's own file does not exist.
+    """
+    entry = index.entry(lesson_id)
+    if entry is None:
+        raise KeyError(lesson_id)
+    if entry.file is None:
+        return index.inline_lesson(entry)
+    return await registry.acompiled(lesson_file_path(module_id, entry.file), compile_lesson)
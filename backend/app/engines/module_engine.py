@@ -7,12 +7,46 @@ into frontend-ready payloads.
 
 It is intentionally lightweight and stateless. Higher-level lesson
 flow, persistence, and personalization are handled elsewhere.
-"""
-import json
-import os
-from typing import Dict
 
+Step types are dispatched through a handler registry (`STEP_HANDLERS`);
+new step types can be added with `register_step_handler`. Because
+handlers are pure functions of immutable content, each module is compiled
+once (per file version) into processed step payloads, and serving a step
+is an index lookup. Personalized handlers (quiz_result) are memoized per
+set of inputs.
+
+Scenarios with per-style step variants (see app.models.content) are also
+compiled once per style that has variants, reusing the payloads of steps
+a style leaves unchanged. Rendering for a style (`primary_style`) then
+picks that precompiled step list: personalization is a dict lookup.
 
+Handlers receive typed step models (app.models.content), validated when
+the module is compiled, so they read attributes directly.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+from app.loaders.content_registry import aload_content_json, freeze, load_content_json, registry
+from app.loaders.module_loader import MODULE_DIR
+from app.metrics import timed_loader
+from app.models.content import (
+    Module,
+    QuizResultStep,
+    QuizStep,
+    ReflectionStep,
+    Step,
+    TextStep,
+    apply_variant,
+    parse_module,
+    parse_step,
+)
+
+# Upper bound on memoized personalized payloads per compiled step list.
+MAX_MEMOIZED_RENDERS = 256
+
+
+@timed_loader("load_module")
 def load_module(filename: str) -> Dict:
     """
     Load a lesson module JSON file from disk for engine-based execution.
@@ -20,13 +54,17 @@ def load_module(filename: str) -> Dict:
     This function is used by engine-driven flows and expects a full
     filename (including .json), unlike raw loaders that accept module IDs.
     """
-    # Resolve module path relative to this file to avoid CWD dependence
-    base_path = os.path.dirname(os.path.abspath(__file__))
-    full_path = os.path.join(base_path, "..", "content", "modules", filename)
+    # Served from the shared content registry; re-parsed only when the file changes.
+    return load_content_json(MODULE_DIR / filename)
+
+
+@timed_loader("aload_module")
+async def aload_module(filename: str) -> Dict:
+    """
+    Async variant of `load_module()`; file I/O runs off the event loop.
+    """
+    return await aload_content_json(MODULE_DIR / filename)
 
-    with open(full_path, "r") as file:
-        return json.load(file)
-    
 
 def get_step(module: dict, index: int) -> dict:
     """
@@ -42,68 +80,137 @@ def get_step(module: dict, index: int) -> dict:
     return steps[index]
 
 
-def process_step(step: dict, **kwargs) -> dict:
+@dataclass(frozen=True)
+class StepHandler:
     """
-    Dispatch a raw step dictionary to the appropriate handler based on its type.
+    A registered step handler.
 
-    This function acts as a router between step definitions and handler
-    functions. It does not manage lesson flow or state.
+    Attributes:
+        handler: Transforms a typed step into a frontend-ready payload.
+        personalized: If True, the handler also receives the keyword
+            arguments given to `process_step` (e.g. quiz results), and its
+            output is rendered per request instead of precompiled.
+    """
+
+    handler: Callable[..., dict]
+    personalized: bool = False
+
+
+# Step type -> handler. Extend with `register_step_handler`.
+STEP_HANDLERS: Dict[str, StepHandler] = {}
+
+
+def register_step_handler(step_type: str, personalized: bool = False):
+    """
+    Decorator registering a handler for a step type.
+
+    Handlers must be pure functions of the step (and, for personalized
+    handlers, their keyword arguments): their output is cached and shared
+    between requests. Step types without a typed model arrive as a
+    GenericStep, which supports item access.
+
+    Example:
+        @register_step_handler("checklist")
+        def handle_checklist(step: GenericStep) -> dict:
+            return {"type": "checklist", "items": step["items"]}
     """
-    step_type = step.get("type")
+    def decorator(handler: Callable[..., dict]) -> Callable[..., dict]:
+        STEP_HANDLERS[step_type] = StepHandler(handler, personalized)
+        return handler
 
-    if step_type == "text":
-        return handle_text(step)
+    return decorator
 
-    elif step_type == "reflection":
-        return handle_reflection(step)
 
-    elif step_type == "quiz":
-        return handle_quiz(step)
+def process_step(step: Step | Mapping, **kwargs) -> dict:
+    """
+    Dispatch a step to the appropriate handler based on its type.
+
+    This function acts as a router between step definitions and handler
+    functions. It does not manage lesson flow or state. Raw step
+    dictionaries are validated first.
+
+    Raises:
+        ContentError: If a raw step is malformed.
+        ValueError: If no handler is registered for the step type.
+    """
+    if isinstance(step, dict):
+        step = parse_step(step)
 
-    elif step_type == "quiz_result":
-        return handle_quiz_result(step, **kwargs)
+    entry = STEP_HANDLERS.get(step.type)
 
-    else:
-        raise ValueError(f"Unknown step type: {step_type}")
+    if entry is None:
+        raise ValueError(f"Unknown step type: {step.type}")
 
+    if entry.personalized:
+        return entry.handler(step, **kwargs)
+    return entry.handler(step)
 
-def handle_text(step: dict) -> dict:
-    """Transform a text step into a frontend-ready payload."""
+
+@register_step_handler("text")
+def handle_text(step: TextStep) -> dict:
+    """
+    Transform a text step into a frontend-ready payload.
+
+    The body is always returned as "content" (scenario files may store it
+    under "text"; the model normalizes both).
+    """
     return {
         "type": "text",
-        "content": step["content"]
+        "content": step.content
     }
 
 
-def handle_reflection(step: dict) -> dict:
+@register_step_handler("reflection")
+def handle_reflection(step: ReflectionStep) -> dict:
     """Transform a reflection step into a frontend-ready payload."""
     return {
         "type": "reflection",
-        "prompt": step["prompt"]
+        "prompt": step.prompt
     }
 
 
-def handle_quiz(step: dict) -> dict:
+@register_step_handler("quiz")
+def handle_quiz(step: QuizStep) -> dict:
     """
     Transform a quiz step into a frontend-ready payload.
 
-    Only returns the quiz ID. The frontend is responsible for fetching
-    quiz content from the quiz service.
+    For quiz-service quizzes, only returns the quiz ID. The frontend is
+    responsible for fetching quiz content from the quiz service.
+
+    Scenario steps may instead define a single inline question, which is
+    passed through as-is.
     """
+    if step.quiz_id is None:
+        return {
+            "type": "quiz",
+            "question": step.question,
+            "options": list(step.options),
+            "correct_index": step.correct_index,
+        }
+
     return {
         "type": "quiz",
-        "quiz_id": step["quiz_id"]
+        "quiz_id": step.quiz_id
     }
 
 
-def handle_quiz_result(step: dict, primary_style=None, strategist=None, guide=None, anchor=None, spark=None) -> dict:
+@register_step_handler("quiz_result", personalized=True)
+def handle_quiz_result(step: QuizResultStep, primary_style=None, strategist=None, guide=None, anchor=None, spark=None, breakdown=None) -> dict:
     """
     Generate a quiz_result step payload using quiz outcome parameters.
 
-    This handler expects quiz results to be passed via query parameters.
-    This is MVP behavior and may be replaced by persisted quiz results
-    in later phases.
+    Quiz results come either from query parameters (MVP behavior) or from
+    a stored session, in which case the full `breakdown` dict is passed.
+
+    Steps that follow an inline scenario quiz carry their own feedback
+    text and are passed through unchanged.
     """
+    if step.inline:
+        return _with_coaching(step, {
+            "type": "quiz_result",
+            "correct_text": step.correct_text,
+            "incorrect_text": step.incorrect_text,
+        })
     # If frontend didn't provide a style, show an error (expected MVP behavior).
     if primary_style is None:
         return {
@@ -111,6 +218,13 @@ def handle_quiz_result(step: dict, primary_style=None, strategist=None, guide=No
             "error": "Missing primary_style. Quiz results must be passed as query parameters."
         }
 
+    if breakdown is not None:
+        return _with_coaching(step, {
+            "type": "quiz_result",
+            "primary_style": primary_style,
+            "breakdown": dict(breakdown) or None
+        })
+
     # Optional breakdown (only included if provided).
     breakdown = {}
 
@@ -123,9 +237,173 @@ def handle_quiz_result(step: dict, primary_style=None, strategist=None, guide=No
     if spark is not None:
         breakdown["spark"] = spark
 
-    return {
+    return _with_coaching(step, {
         "type": "quiz_result",
         "primary_style": primary_style,
         "breakdown": breakdown if breakdown else None
-    }
+    })
+
+
+def _with_coaching(step: QuizResultStep, payload: dict) -> dict:
+    # Coaching text (usually a per-style variant) is only sent when set.
+    if step.coaching is not None:
+        payload["coaching"] = step.coaching
+    return payload
+
+
+# ============================================================
+# Compiled steps
+# ============================================================
+
+def _memo_key(kwargs: dict) -> tuple:
+    """Hashable key for personalized inputs (None values are ignored)."""
+    items = []
+    for name, value in kwargs.items():
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        items.append((name, value))
+    return tuple(sorted(items))
+
+
+@dataclass(frozen=True)
+class CompiledSteps:
+    """
+    A step list processed once into frontend-ready payloads.
+
+    Attributes:
+        steps: The typed steps, in order.
+        payloads: Processed (read-only) payload per step, or None for
+            personalized steps, which are rendered by `render_step`.
+        variants: Style -> the steps compiled with that style's variants.
+    """
+
+    steps: Tuple[Step, ...]
+    payloads: Tuple[Optional[dict], ...]
+    variants: Mapping[str, "CompiledSteps"] = field(default_factory=dict)
+    _memo: Dict[tuple, dict] = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+
+def _compile_payloads(steps: Tuple[Step, ...], base: Optional[CompiledSteps] = None) -> Tuple[Optional[dict], ...]:
+    payloads = []
+    for i, step in enumerate(steps):
+        # Steps a style variant leaves unchanged keep the base payload.
+        if base is not None and step is base.steps[i]:
+            payloads.append(base.payloads[i])
+            continue
+        entry = STEP_HANDLERS.get(step.type)
+        if entry is None:
+            raise ValueError(f"Unknown step type: {step.type}")
+        payloads.append(None if entry.personalized else freeze(entry.handler(step)))
+    return tuple(payloads)
+
+
+def compile_steps(steps, variants: Optional[Mapping[str, Sequence[Step]]] = None) -> CompiledSteps:
+    """
+    Processes every non-personalized step once.
+
+    Accepts typed steps or raw step dictionaries (validated here).
+    `variants` (style -> typed steps, as in `Scenario.variants`) are
+    compiled alongside.
+
+    Raises:
+        ContentError: If a raw step is malformed.
+        ValueError: If a step has an unknown type.
+    """
+    steps = tuple(parse_step(step) if isinstance(step, dict) else step for step in steps)
+    base = CompiledSteps(steps=steps, payloads=_compile_payloads(steps))
+    if not variants:
+        return base
+
+    styled = {}
+    for style, style_steps in variants.items():
+        style_steps = tuple(style_steps)
+        styled[style] = CompiledSteps(steps=style_steps, payloads=_compile_payloads(style_steps, base))
+    return CompiledSteps(steps=base.steps, payloads=base.payloads, variants=styled)
+
+
+def for_style(compiled: CompiledSteps, style: Optional[str]) -> CompiledSteps:
+    """Returns the steps as compiled for `style` (the base steps if it has no variants)."""
+    if style is None:
+        return compiled
+    return compiled.variants.get(style, compiled)
+
+
+def render_step(compiled: CompiledSteps, index: int, **kwargs) -> dict:
+    """
+    Returns the processed payload for one step.
+
+    Precompiled steps are returned directly. Personalized steps are
+    rendered once per distinct set of inputs and memoized. A
+    `primary_style` selects that style's variants, if the steps have any.
+
+    Raises:
+        IndexError: If the index is out of range.
+    """
+    compiled = for_style(compiled, kwargs.get("primary_style"))
+    if index < 0 or index >= len(compiled.payloads):
+        raise IndexError(f"Step index {index} is out of range.")
+
+    payload = compiled.payloads[index]
+    if payload is not None:
+        return payload
+
+    key = (index, _memo_key(kwargs))
+    cached = compiled._memo.get(key)
+    if cached is not None:
+        return cached
+
+    rendered = freeze(process_step(compiled.steps[index], **kwargs))
+    with compiled._lock:
+        if len(compiled._memo) >= MAX_MEMOIZED_RENDERS:
+            compiled._memo.clear()
+        compiled._memo[key] = rendered
+    return rendered
+
+
+def compile_module(module: Module | Mapping) -> Dict[str, CompiledSteps]:
+    """
+    Compiles every scenario in a module.
+
+    Raw module JSON is validated into a typed Module first.
+
+    Returns scenario id -> CompiledSteps.
+
+    Raises:
+        ContentError: If the module is malformed.
+    """
+    if not isinstance(module, Module):
+        module = parse_module(module)
+    return {scenario.id: compile_steps(scenario.steps, scenario.variants) for scenario in module.scenarios}
+
+
+def personalize_scenario(scenario: Mapping, style: str) -> dict:
+    """
+    Returns a raw scenario as seen by learners of `style`: every step with
+    that style's variants applied and the `variants` fields removed.
+    """
+    styled = dict(scenario)
+    styled["steps"] = [apply_variant(step, style) for step in scenario.get("steps", ())]
+    return styled
+
+
+@timed_loader("load_compiled_module")
+def load_compiled_module(module_id: str) -> Dict[str, CompiledSteps]:
+    """
+    Returns compiled scenarios for a module, built once per file version.
+
+    Raises:
+        FileNotFoundError: If the module file does not exist.
+    """
+    return registry.compiled(MODULE_DIR / f"{module_id}.json", compile_module)
+
 
+@timed_loader("aload_compiled_module")
+async def aload_compiled_module(module_id: str) -> Dict[str, CompiledSteps]:
+    """Async variant of `load_compiled_module()`."""
+    return await registry.acompiled(MODULE_DIR / f"{module_id}.json", compile_module)
@@ -1,8 +1,36 @@
-import json
-import os
-from typing import List, Dict
+from __future__ import annotations
 
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from operator import add
+from typing import List, Dict, Sequence, Tuple
 
+from app.loaders.content_registry import CONTENT_DIR, aload_content_json, load_content_json, registry
+from app.metrics import timed_loader
+from app.models.content import Quiz, parse_quiz
+
+# Marks (question, answer) slots that do not exist in the compiled table.
+_NO_ANSWER = 0xFF
+
+
+class InvalidAnswers(ValueError):
+    """
+    Raised when a submission does not match a quiz's shape.
+
+    `position` is the index of the first offending answer, or None when the
+    number of answers is wrong. Batch scoring also sets `submission`.
+    """
+
+    def __init__(self, message: str, position: int | None = None, submission: int | None = None):
+        super().__init__(message)
+        self.position = position
+        self.submission = submission
+
+
+@timed_loader("load_quiz")
 def load_quiz(filename: str) -> dict:
     """
     Load a quiz JSON file from the /content/quizzes/ directory.
@@ -26,12 +54,287 @@ def load_quiz(filename: str) -> dict:
       works regardless of where the application is run from.
     - This is intentionally backend-only logic and does not sanitize or
       hide scoring metadata; routers handle that.
+    - Parsed quizzes are cached in the shared content registry and are
+      read-only. The file is only re-read when its mtime or size changes.
+    """
+    return load_content_json(_quiz_path(filename))
+
+
+@timed_loader("aload_quiz")
+async def aload_quiz(filename: str) -> dict:
+    """
+    Async variant of `load_quiz()` for `async def` routes.
+
+    File I/O runs off the event loop, and concurrent loads of the same quiz
+    share a single read.
+    """
+    return await aload_content_json(_quiz_path(filename))
+
+
+def _quiz_path(filename: str) -> Path:
+    return CONTENT_DIR / "quizzes" / filename
+
+
+@dataclass(frozen=True)
+class CompiledQuiz:
+    """
+    A quiz reduced to an integer scoring table.
+
+    Attributes
+    ----------
+    styles : tuple[str, ...]
+        Style names, in order of first appearance in the quiz file. Scoring
+        results and tie-breaking follow this order.
+    answer_counts : tuple[int, ...]
+        Number of answers for each question.
+    stride : int
+        Row width of the table (the largest answer count).
+    table : bytes
+        Flat question x answer matrix of style indices. The style for answer
+        `a` of question `q` is `table[q * stride + a]`. Padding slots hold
+        0xFF.
+    offsets : tuple[int, ...]
+        Row offset of each question (`q * stride`), precomputed for scoring.
+    """
+
+    styles: Tuple[str, ...]
+    answer_counts: Tuple[int, ...]
+    stride: int
+    table: bytes
+    offsets: Tuple[int, ...]
+
+    @property
+    def question_count(self) -> int:
+        return len(self.answer_counts)
+
+
+def compile_quiz(data: dict | Quiz) -> CompiledQuiz:
+    """
+    Compile quiz content into a CompiledQuiz scoring table.
+
+    This runs once per quiz file version (see `load_compiled_quiz`), so
+    scoring never has to walk the nested question/answer dictionaries.
+    Raw quiz JSON is validated into a typed Quiz first (ContentError if
+    malformed).
+    """
+    quiz = data if isinstance(data, Quiz) else parse_quiz(data)
+    questions = quiz.questions
+
+    styles: List[str] = []
+    style_index: Dict[str, int] = {}
+    for q_obj in questions:
+        for answer in q_obj.answers:
+            style = answer.style
+            if style not in style_index:
+                style_index[style] = len(styles)
+                styles.append(style)
+
+    if len(styles) >= _NO_ANSWER:
+        raise ValueError("Quizzes support at most 254 distinct styles.")
+
+    answer_counts = tuple(len(q_obj.answers) for q_obj in questions)
+    stride = max(answer_counts, default=0)
+
+    table = bytearray([_NO_ANSWER]) * (stride * len(questions))
+    for q_index, q_obj in enumerate(questions):
+        row = q_index * stride
+        for a_index, answer in enumerate(q_obj.answers):
+            table[row + a_index] = style_index[answer.style]
+
+    return CompiledQuiz(
+        styles=tuple(styles),
+        answer_counts=answer_counts,
+        stride=stride,
+        table=bytes(table),
+        offsets=tuple(range(0, stride * len(questions), stride)),
+    )
+
+
+@timed_loader("load_compiled_quiz")
+def load_compiled_quiz(filename: str) -> CompiledQuiz:
+    """
+    Load a quiz and return its compiled scoring table.
+
+    The table is compiled once and cached until the quiz file changes.
+    """
+    return registry.compiled(_quiz_path(filename), compile_quiz)
+
+
+@timed_loader("aload_compiled_quiz")
+async def aload_compiled_quiz(filename: str) -> CompiledQuiz:
+    """Async variant of `load_compiled_quiz()`."""
+    return await registry.acompiled(_quiz_path(filename), compile_quiz)
+
+
+@dataclass(frozen=True)
+class PublicQuiz:
+    """
+    The client-facing view of a quiz: question and answer texts only.
+
+    Built once per quiz file version, separately from the CompiledQuiz
+    scoring view, so serving quiz content never touches style data.
+
+    Attributes
+    ----------
+    questions : tuple[tuple[str, tuple[str, ...]], ...]
+        (question text, answer texts) for each question, in file order.
+    """
+
+    questions: Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+    @property
+    def answer_counts(self) -> Tuple[int, ...]:
+        return tuple(len(answers) for _, answers in self.questions)
+
+    def payload(self, seed: int | None = None) -> dict:
+        """
+        Build the content payload, with answers shuffled per `seed` if given.
+
+        The same seed always yields the same order (see `answer_order`), so
+        a submission made against it can be scored with `shuffled_quiz`.
+        """
+        if seed is None:
+            return {
+                "questions": [
+                    {"question": question, "answers": list(answers)}
+                    for question, answers in self.questions
+                ]
+            }
+
+        order = answer_order(self.answer_counts, seed)
+        return {
+            "seed": seed,
+            "questions": [
+                {"question": question, "answers": [answers[i] for i in perm]}
+                for (question, answers), perm in zip(self.questions, order)
+            ],
+        }
+
+
+def compile_public_quiz(data: dict | Quiz) -> PublicQuiz:
+    """Strip scoring metadata ('style') from quiz content."""
+    quiz = data if isinstance(data, Quiz) else parse_quiz(data)
+    return PublicQuiz(
+        questions=tuple(
+            (q_obj.question, tuple(a.text for a in q_obj.answers))
+            for q_obj in quiz.questions
+        )
+    )
+
+
+@timed_loader("load_public_quiz")
+def load_public_quiz(filename: str) -> PublicQuiz:
+    """Load a quiz's public view, built once per quiz file version."""
+    return registry.compiled(_quiz_path(filename), compile_public_quiz)
+
+
+@timed_loader("aload_public_quiz")
+async def aload_public_quiz(filename: str) -> PublicQuiz:
+    """Async variant of `load_public_quiz()`."""
+    return await registry.acompiled(_quiz_path(filename), compile_public_quiz)
+
+
+def answer_order(answer_counts: Sequence[int], seed: int) -> Tuple[Tuple[int, ...], ...]:
     """
-    base_path = os.path.dirname(os.path.abspath(__file__))
-    full_path = os.path.join(base_path, "..", "content", "quizzes", filename)
+    Deterministic per-question answer permutations for a shuffle seed.
+
+    `order[q][shown]` is the original index of the answer displayed at
+    position `shown` of question `q`.
+    """
+    rng = random.Random(seed)
+    order = []
+    for count in answer_counts:
+        perm = list(range(count))
+        rng.shuffle(perm)
+        order.append(tuple(perm))
+    return tuple(order)
+
+
+@lru_cache(maxsize=256)
+def shuffled_quiz(quiz: CompiledQuiz, seed: int) -> CompiledQuiz:
+    """
+    Return a scoring table whose answer columns follow a seed's shuffle.
+
+    Answers submitted against a shuffled public view can then be scored
+    directly, with no per-request index mapping.
+    """
+    table = bytearray(quiz.table)
+    for offset, perm in zip(quiz.offsets, answer_order(quiz.answer_counts, seed)):
+        for shown, original in enumerate(perm):
+            table[offset + shown] = quiz.table[offset + original]
+
+    return CompiledQuiz(
+        styles=quiz.styles,
+        answer_counts=quiz.answer_counts,
+        stride=quiz.stride,
+        table=bytes(table),
+        offsets=quiz.offsets,
+    )
 
-    with open(full_path, "r") as file:
-        return json.load(file)
+
+def score_answers(quiz: CompiledQuiz, user_answers: Sequence[int]) -> List[int]:
+    """
+    Tally style counts for one submission using the compiled table.
+
+    Returns a list of counts aligned with `quiz.styles`.
+
+    Raises
+    ------
+    InvalidAnswers
+        If the number of answers does not match the quiz, or any answer
+        index is out of range for its question.
+    """
+    _check_length(quiz, user_answers)
+    try:
+        picked = _gather(quiz, quiz.offsets, user_answers)
+    except ValueError:
+        raise _find_invalid_answer(quiz, user_answers) from None
+    return [picked.count(i) for i in range(len(quiz.styles))]
+
+
+def _check_length(quiz: CompiledQuiz, answers: Sequence[int]) -> None:
+    if len(answers) != quiz.question_count:
+        raise InvalidAnswers(
+            f"Expected {quiz.question_count} answers, got {len(answers)}."
+        )
+
+
+def _find_invalid_answer(quiz: CompiledQuiz, answers: Sequence[int]) -> InvalidAnswers:
+    """Build an error naming the first out-of-range answer (slow path only)."""
+    for position, (answer, count) in enumerate(zip(answers, quiz.answer_counts)):
+        if not 0 <= answer < count:
+            return InvalidAnswers(
+                f"Answer {position} must be between 0 and {count - 1}, got {answer}.",
+                position=position,
+            )
+    return InvalidAnswers("Answer index out of range.")
+
+
+def _gather(quiz: CompiledQuiz, offsets: Sequence[int], answers: Sequence[int]) -> bytes:
+    """
+    Look up the style index of every answer with C-level iteration only.
+
+    `offsets` and `answers` must have equal length. Raises ValueError if any
+    answer falls outside its question's range; callers locate the offending
+    answer only after this cheap check fails.
+    """
+    if answers and (min(answers) < 0 or max(answers) >= quiz.stride):
+        raise ValueError("Answer index out of range.")
+
+    picked = bytes(map(quiz.table.__getitem__, map(add, offsets, answers)))
+
+    if _NO_ANSWER in picked:
+        raise ValueError("Answer index out of range.")
+
+    return picked
+
+
+def _result(quiz: CompiledQuiz, counts: List[int]) -> dict:
+    style_counts = dict(zip(quiz.styles, counts))
+    return {
+        "primary_style": calculate_result(style_counts),
+        "breakdown": style_counts
+    }
 
 
 def calculate_result(style_counts: Dict[str, int]) -> str:
@@ -61,8 +364,8 @@ def run_quiz(filename: str, user_answers: List[int]) -> dict:
     """
     Evaluate a quiz submission and return style results.
 
-    This is the core quiz scoring engine. It loads quiz content, matches each
-    user-selected answer to its corresponding style tag, tallies the results, and
+    This is the core quiz scoring engine. It loads the compiled quiz table,
+    maps each user-selected answer to its style index, tallies the results, and
     determines the primary style.
 
     Parameters
@@ -83,33 +386,71 @@ def run_quiz(filename: str, user_answers: List[int]) -> dict:
 
     Notes
     -----
-    - The length of user_answers must match the number of questions in the quiz.
-    - This engine does NOT validate input shapes; the router layer must ensure
-      user_answers is valid.
+    - The length of user_answers must match the number of questions in the quiz;
+      a mismatch or an out-of-range answer index raises InvalidAnswers, checked
+      against the compiled quiz's precomputed shape.
+    - The breakdown includes every style that appears in the quiz file.
     - This engine does NOT sanitize output; routers handle formatting for the
       frontend.
     - All scoring logic is handled here so multiple routers can reuse it.
     """
-    data = load_quiz(filename)
-    questions = data["questions"]
+    return score_quiz(load_compiled_quiz(filename), user_answers)
 
-    # Initialize counters. These must correspond to the styles used in the quiz files.
-    style_counts = {
-        "strategist": 0,
-        "guide": 0,
-        "anchor": 0,
-        "spark": 0
-    }
 
-    # Evaluate each answer.
-    for q_index, q_obj in enumerate(questions):
-        answer_index = user_answers[q_index]
-        style = q_obj["answers"][answer_index]["style"]
-        style_counts[style] += 1
+def score_quiz(quiz: CompiledQuiz, user_answers: Sequence[int]) -> dict:
+    """
+    Score one submission against an already-loaded compiled quiz.
 
-    primary_style = calculate_result(style_counts)
+    Returns the same shape as `run_quiz`. Async routes load the quiz with
+    `aload_compiled_quiz` and call this directly.
+    """
+    return _result(quiz, score_answers(quiz, user_answers))
 
-    return {
-        "primary_style": primary_style,
-        "breakdown": style_counts
-    }
+
+def run_quiz_batch(filename: str, submissions: Sequence[Sequence[int]]) -> List[dict]:
+    """
+    Score many submissions for the same quiz in a single pass.
+
+    See `score_quiz_batch` for details.
+    """
+    return score_quiz_batch(load_compiled_quiz(filename), submissions)
+
+
+def score_quiz_batch(quiz: CompiledQuiz, submissions: Sequence[Sequence[int]]) -> List[dict]:
+    """
+    Score many submissions against an already-loaded compiled quiz.
+
+    All answers in the batch are flattened and looked up against the compiled
+    table in one gather; per-submission counts are then taken from slices of
+    the gathered style indices.
+
+    Raises
+    ------
+    InvalidAnswers
+        If any submission is invalid. `submission` names the offending
+        submission index.
+    """
+    width = quiz.question_count
+    style_range = range(len(quiz.styles))
+
+    flat_answers = list(chain.from_iterable(submissions))
+    try:
+        if len(flat_answers) != width * len(submissions):
+            raise ValueError("Answer count mismatch.")
+        picked = _gather(quiz, quiz.offsets * len(submissions), flat_answers)
+    except ValueError:
+        # Rare path: re-check individually to report which submission failed.
+        for s_index, answers in enumerate(submissions):
+            try:
+                score_answers(quiz, answers)
+            except InvalidAnswers as exc:
+                exc.submission = s_index
+                raise
+        raise
+
+    results = []
+    for s_index in range(len(submissions)):
+        row = picked[s_index * width:(s_index + 1) * width]
+        results.append(_result(quiz, [row.count(i) for i in style_range]))
+
+    return results
@@ -0,0 +1,266 @@
+"""
+Branching scenario engine.
+
+Standalone scenarios in content/scenarios are step graphs: each step has
+an "id" and a list of "options", and each option names the step it leads
+to via "next_step". A step without options ends the scenario.
+
+Each scenario file is compiled once (per file version) into a ScenarioGraph:
+- step ids are mapped to integer indexes and options to index adjacency,
+- dangling `next_step` links, duplicate ids and steps that can never reach
+  an ending are rejected,
+- cycles are detected (they are allowed, e.g. "try again" branches),
+- the shortest distance to an ending is precomputed for every step.
+
+Advancing through a branch is then a single tuple lookup.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.loaders.content_registry import freeze, registry
+from app.loaders.scenario_loader import SCENARIO_DIR
+
+
+class ScenarioGraphError(ValueError):
+    """Raised when a scenario's step graph is invalid."""
+
+    def __init__(self, scenario_id: str, problems: List[str]):
+        super().__init__(f"Scenario '{scenario_id}' is invalid: " + "; ".join(problems))
+        self.problems = problems
+
+
+@dataclass(frozen=True)
+class ScenarioGraph:
+    """
+    A compiled scenario step graph.
+
+    Attributes:
+        scenario_id: The scenario's id.
+        title: The scenario's title.
+        step_ids: Step id per index (index 0 is the start step).
+        index: Step id -> index.
+        edges: Per step, the target index of each option (in option order).
+        payloads: Per step, the client-facing payload (links removed).
+        distance_to_end: Per step, the fewest choices needed to finish.
+        has_cycles: True if any branch can revisit a step.
+        unreachable: Ids of steps that cannot be reached from the start.
+    """
+
+    scenario_id: str
+    title: str
+    step_ids: Tuple[str, ...]
+    index: Dict[str, int]
+    edges: Tuple[Tuple[int, ...], ...]
+    payloads: Tuple[dict, ...]
+    distance_to_end: Tuple[int, ...]
+    has_cycles: bool
+    unreachable: Tuple[str, ...]
+
+    @property
+    def start(self) -> int:
+        return 0
+
+    def is_end(self, step: int) -> bool:
+        return not self.edges[step]
+
+    def advance(self, step: int, option: int) -> int:
+        """
+        Returns the index of the step that `option` leads to.
+
+        Raises:
+            IndexError: If the option does not exist on this step.
+        """
+        options = self.edges[step]
+        if option < 0 or option >= len(options):
+            raise IndexError(f"Option {option} is out of range.")
+        return options[option]
+
+
+def _public_payload(step: dict) -> dict:
+    """Strips routing data (`next_step`) so clients only see option labels."""
+    payload = {k: v for k, v in step.items() if k != "options"}
+    payload["options"] = [
+        {k: v for k, v in option.items() if k != "next_step"}
+        for option in step.get("options", ())
+    ]
+    return payload
+
+
+def _has_cycle(edges: Tuple[Tuple[int, ...], ...]) -> bool:
+    """Iterative three-color DFS over the whole graph."""
+    WHITE, GRAY, BLACK = 0, 1, 2
+    color = [WHITE] * len(edges)
+
+    for root in range(len(edges)):
+        if color[root] != WHITE:
+            continue
+        color[root] = GRAY
+        stack = [(root, iter(edges[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if color[child] == GRAY:
+                    return True
+                if color[child] == WHITE:
+                    color[child] = GRAY
+                    stack.append((child, iter(edges[child])))
+                    break
+            else:
+                color[node] = BLACK
+                stack.pop()
+
+    return False
+
+
+def _distances_to_end(edges: Tuple[Tuple[int, ...], ...]) -> List[Optional[int]]:
+    """Multi-source BFS from every ending over reversed edges."""
+    reverse: List[List[int]] = [[] for _ in edges]
+    for source, targets in enumerate(edges):
+        for target in targets:
+            reverse[target].append(source)
+
+    distance: List[Optional[int]] = [None] * len(edges)
+    queue = deque()
+    for node, targets in enumerate(edges):
+        if not targets:
+            distance[node] = 0
+            queue.append(node)
+
+    while queue:
+        node = queue.popleft()
+        for prev in reverse[node]:
+            if distance[prev] is None:
+                distance[prev] = distance[node] + 1
+                queue.append(prev)
+
+    return distance
+
+
+def _reachable_from(start: int, edges: Tuple[Tuple[int, ...], ...]) -> List[bool]:
+    seen = [False] * len(edges)
+    if not edges:
+        return seen
+    seen[start] = True
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for target in edges[node]:
+            if not seen[target]:
+                seen[target] = True
+                queue.append(target)
+    return seen
+
+
+def compile_scenario_graph(data: dict) -> ScenarioGraph:
+    """
+    Compiles raw scenario JSON into a ScenarioGraph.
+
+    Raises:
+        ScenarioGraphError: For malformed structure (steps or options that
+            are not objects, non-string ids), missing/duplicate step ids,
+            dangling `next_step` links, or steps from which no ending is
+            reachable.
+    """
+    if not isinstance(data, Mapping):
+        raise ScenarioGraphError("", ["scenario must be an object"])
+
+    scenario_id = str(data.get("id", ""))
+    steps = data.get("steps", ())
+    problems: List[str] = []
+
+    if not isinstance(steps, (list, tuple)):
+        raise ScenarioGraphError(scenario_id, ["'steps' must be a list"])
+    if not steps:
+        raise ScenarioGraphError(scenario_id, ["scenario has no steps"])
+
+    index: Dict[str, int] = {}
+    for i, step in enumerate(steps):
+        if not isinstance(step, Mapping):
+            problems.append(f"step {i} is not an object")
+            continue
+        step_id = step.get("id")
+        if step_id is None:
+            problems.append(f"step {i} has no id")
+        elif not isinstance(step_id, str):
+            problems.append(f"step {i} id must be a string")
+        elif step_id in index:
+            problems.append(f"duplicate step id '{step_id}'")
+        else:
+            index[step_id] = i
+
+    edges: List[Tuple[int, ...]] = []
+    for i, step in enumerate(steps):
+        if not isinstance(step, Mapping):
+            continue  # reported above
+        options = step.get("options", ())
+        if not isinstance(options, (list, tuple)):
+            problems.append(f"step '{step.get('id', i)}' options must be a list")
+            continue
+        targets = []
+        for j, option in enumerate(options):
+            if not isinstance(option, Mapping):
+                problems.append(f"step '{step.get('id', i)}' option {j} is not an object")
+                continue
+            target = option.get("next_step")
+            if not isinstance(target, str) or target not in index:
+                problems.append(f"step '{step.get('id', i)}' option {j} links to unknown step '{target}'")
+                continue
+            targets.append(index[target])
+        edges.append(tuple(targets))
+
+    if problems:
+        raise ScenarioGraphError(scenario_id, problems)
+
+    edge_table = tuple(edges)
+    distances = _distances_to_end(edge_table)
+    reachable = _reachable_from(0, edge_table)
+
+    traps = [steps[i]["id"] for i, d in enumerate(distances) if d is None and reachable[i]]
+    if traps:
+        raise ScenarioGraphError(
+            scenario_id, [f"no ending is reachable from step '{t}'" for t in traps]
+        )
+
+    return ScenarioGraph(
+        scenario_id=scenario_id,
+        title=data.get("title", ""),
+        step_ids=tuple(step["id"] for step in steps),
+        index=index,
+        edges=edge_table,
+        payloads=tuple(freeze(_public_payload(step)) for step in steps),
+        # Unreachable dead-ends cannot be visited, so their distance is moot.
+        distance_to_end=tuple(d if d is not None else -1 for d in distances),
+        has_cycles=_has_cycle(edge_table),
+        unreachable=tuple(steps[i]["id"] for i, r in enumerate(reachable) if not r),
+    )
+
+
+def load_scenario_graph(scenario_id: str) -> ScenarioGraph:
+    """
+    Returns the compiled graph for a scenario file, built once per version.
+
+    Raises:
+        FileNotFoundError: If the scenario file does not exist.
+        ScenarioGraphError: If the graph is invalid.
+    """
+    return registry.compiled(SCENARIO_DIR / f"{scenario_id}.json", compile_scenario_graph)
+
+
+async def aload_scenario_graph(scenario_id: str) -> ScenarioGraph:
+    """Async variant of `load_scenario_graph()`."""
+    return await registry.acompiled(SCENARIO_DIR / f"{scenario_id}.json", compile_scenario_graph)
+
+
+def step_payload(graph: ScenarioGraph, step: int) -> dict:
+    """Builds the response for one step of a scenario graph."""
+    return {
+        "scenario_id": graph.scenario_id,
+        "step_id": graph.step_ids[step],
+        "step": graph.payloads[step],
+        "is_end": graph.is_end(step),
+        "steps_to_end": graph.distance_to_end[step],
+    }
@@ -0,0 +1,339 @@
+"""
+Module catalog generated from content/modules.
+
+Builds the Module Picker catalog from each module file's own metadata
+(id, title, estimated_minutes, first scenario) and keeps it in memory.
+
+Refreshes are incremental and throttled:
+- At most one refresh check runs per `min_interval` seconds.
+- The directory is only re-listed when its mtime changes (files added,
+  removed or renamed).
+- Each known file is stat()ed, and only files whose mtime or size changed
+  are re-parsed.
+
+Listing queries (pagination, duration/tag filters) run against a
+CatalogIndex of presorted entry tuples, rebuilt only when the catalog
+changes, so each query costs roughly O(log n + page size); duration
+filters on other sort orders cost O(m log page size) for the m modules
+within the duration bounds.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import bisect
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.loaders.content_registry import registry
+from app.loaders.module_loader import MODULE_DIR, index_module
+from app.singleflight import AsyncSingleFlight
+
+# Seconds between refresh checks. Content changes only on deploy, so a
+# short delay before new modules appear is acceptable.
+DEFAULT_MIN_INTERVAL = 2.0
+
+# Fields a catalog entry carries (and that `fields=` may project).
+CATALOG_FIELDS = (
+    "id",
+    "title",
+    "estimated_minutes",
+    "default_scenario_id",
+    "description",
+    "version",
+    "tags",
+)
+
+# Supported listing orders.
+SORT_KEYS = ("id", "duration")
+
+# Sort position for modules without an estimated duration (listed last).
+_UNKNOWN_MINUTES = 10**9
+
+
+def _catalog_entry(module_id: str, path: Path) -> Optional[dict]:
+    """
+    Builds the catalog entry for one module file.
+
+    Modules without any scenario, or whose file cannot be parsed, are left
+    out, since the picker has nothing to open for them.
+    """
+    try:
+        index = registry.compiled(path, index_module)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if index.default_scenario is None:
+        return None
+
+    module = index.module
+    return {
+        "id": module_id,
+        "title": module.get("title", module_id),
+        "estimated_minutes": module.get("estimated_minutes"),
+        "default_scenario_id": index.default_scenario["id"],
+        "description": module.get("description"),
+        "version": module.get("version"),
+        "tags": list(module.get("tags", ())),
+    }
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _sort_key(entry: dict, sort: str) -> tuple:
+    if sort == "duration":
+        minutes = entry["estimated_minutes"]
+        return (minutes if isinstance(minutes, (int, float)) else _UNKNOWN_MINUTES, entry["id"])
+    return (entry["id"],)
+
+
+def encode_cursor(key: tuple) -> str:
+    """Encodes a sort key as an opaque, URL-safe cursor string."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodes a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("Invalid cursor") from None
+    if not isinstance(key, list) or not key:
+        raise InvalidCursor("Invalid cursor")
+    return tuple(key)
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    """
+    Presorted views over a catalog's entries.
+
+    Attributes:
+        orders: sort name -> (sort keys, entries), both in sorted order.
+        by_tag: tag -> sort name -> (sort keys, entries) for that tag only.
+    """
+
+    orders: Dict[str, Tuple[Tuple[tuple, ...], Tuple[dict, ...]]]
+    by_tag: Dict[str, Dict[str, Tuple[Tuple[tuple, ...], Tuple[dict, ...]]]]
+
+
+def _sorted_view(entries, sort: str) -> Tuple[Tuple[tuple, ...], Tuple[dict, ...]]:
+    keyed = sorted(((_sort_key(e, sort), e) for e in entries), key=lambda pair: pair[0])
+    return tuple(k for k, _ in keyed), tuple(e for _, e in keyed)
+
+
+def build_catalog_index(entries: Tuple[dict, ...]) -> CatalogIndex:
+    """Builds the presorted listing index for a set of catalog entries."""
+    tagged: Dict[str, List[dict]] = {}
+    for entry in entries:
+        for tag in entry["tags"]:
+            tagged.setdefault(tag, []).append(entry)
+
+    return CatalogIndex(
+        orders={sort: _sorted_view(entries, sort) for sort in SORT_KEYS},
+        by_tag={
+            tag: {sort: _sorted_view(tag_entries, sort) for sort in SORT_KEYS}
+            for tag, tag_entries in tagged.items()
+        },
+    )
+
+
+def _duration_bounds(keys: Tuple[tuple, ...], min_minutes, max_minutes) -> Tuple[int, int]:
+    """
+    Bisects a duration-ordered key tuple for entries within the bounds.
+
+    When any bound is given, modules without a duration are excluded.
+    """
+    start, stop = 0, len(keys)
+    if min_minutes is not None:
+        start = bisect.bisect_left(keys, (min_minutes,))
+    if max_minutes is not None:
+        # Keys are (minutes, id); stop before the first minutes > max.
+        stop = bisect.bisect_left(keys, (math.nextafter(max_minutes, math.inf),))
+    if min_minutes is not None or max_minutes is not None:
+        stop = min(stop, bisect.bisect_left(keys, (_UNKNOWN_MINUTES,)))
+    return start, max(start, stop)
+
+
+def query_catalog(
+    index: CatalogIndex,
+    sort: str = "id",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    min_minutes: Optional[float] = None,
+    max_minutes: Optional[float] = None,
+    tag: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of catalog entries and the cursor for the next page.
+
+    Duration bounds are always bisected on the duration-ordered view. With
+    sort="duration" that slice is the listing and the cursor is bisected
+    into it; with another sort the slice holds the only candidates, which
+    are ordered by that sort's key. A next cursor is only returned when
+    another matching entry exists.
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed.
+    """
+    views = index.by_tag.get(tag, {}) if tag is not None else index.orders
+    after = decode_cursor(cursor) if cursor is not None else None
+    filtered = min_minutes is not None or max_minutes is not None
+
+    if sort == "duration" or not filtered:
+        keys, entries = views.get(sort, ((), ()))
+        start, stop = 0, len(entries)
+        if sort == "duration":
+            start, stop = _duration_bounds(keys, min_minutes, max_minutes)
+        if after is not None:
+            try:
+                start = max(start, bisect.bisect_right(keys, after, start, stop))
+            except TypeError:
+                raise InvalidCursor("Invalid cursor") from None
+        end = stop if limit is None else min(stop, start + limit)
+        page = list(entries[start:end])
+        more = end < stop
+    else:
+        duration_keys, duration_entries = views.get("duration", ((), ()))
+        lo, hi = _duration_bounds(duration_keys, min_minutes, max_minutes)
+        candidates = [(_sort_key(entry, sort), entry) for entry in duration_entries[lo:hi]]
+        try:
+            if after is not None:
+                candidates = [pair for pair in candidates if pair[0] > after]
+            if limit is None:
+                chosen = sorted(candidates, key=lambda pair: pair[0])
+            else:
+                chosen = heapq.nsmallest(limit + 1, candidates, key=lambda pair: pair[0])
+        except TypeError:
+            raise InvalidCursor("Invalid cursor") from None
+        more = limit is not None and len(chosen) > limit
+        page = [entry for _, entry in chosen[:limit]]
+
+    next_cursor = None
+    if more and page:
+        next_cursor = encode_cursor(_sort_key(page[-1], sort))
+
+    return page, next_cursor
+
+
+class ModuleCatalog:
+    """
+    In-memory catalog of module metadata, kept in sync with a directory.
+
+    `entries` is a tuple of catalog dicts sorted by module id. The tuple is
+    only rebuilt when an entry changes, so its identity can be used as a
+    cache key for rendered responses.
+    """
+
+    def __init__(self, module_dir: Path = MODULE_DIR, min_interval: float = DEFAULT_MIN_INTERVAL):
+        self.module_dir = Path(module_dir)
+        self.min_interval = min_interval
+
+        self._dir_mtime: Optional[int] = None
+        # module_id -> ((mtime_ns, size), entry or None)
+        self._files: Dict[str, Tuple[Tuple[int, int], Optional[dict]]] = {}
+        self._entries: Tuple[dict, ...] = ()
+        self._index: CatalogIndex = build_catalog_index(())
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Concurrent async refreshes share one threadpool call.
+        self._refreshes = AsyncSingleFlight("catalog_refresh")
+
+        self.reparsed = 0
+
+    @property
+    def entries(self) -> Tuple[dict, ...]:
+        return self._entries
+
+    @property
+    def index(self) -> CatalogIndex:
+        """Presorted listing index, rebuilt whenever `entries` changes."""
+        return self._index
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.min_interval
+
+    def refresh(self, force: bool = False) -> Tuple[dict, ...]:
+        """
+        Brings the catalog up to date with the module directory.
+
+        Returns the (possibly unchanged) entries tuple.
+        """
+        if not force and not self._due():
+            return self._entries
+
+        with self._lock:
+            if not force and not self._due():
+                return self._entries
+
+            changed = False
+
+            dir_mtime = os.stat(self.module_dir).st_mtime_ns
+            if dir_mtime != self._dir_mtime:
+                present = {p.stem for p in self.module_dir.glob("*.json")}
+                for module_id in set(self._files) - present:
+                    del self._files[module_id]
+                    changed = True
+                for module_id in present - set(self._files):
+                    # Placeholder signature forces a parse below.
+                    self._files[module_id] = ((-1, -1), None)
+                self._dir_mtime = dir_mtime
+
+            for module_id, (signature, entry) in list(self._files.items()):
+                path = self.module_dir / f"{module_id}.json"
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    del self._files[module_id]
+                    changed = True
+                    continue
+
+                current = (st.st_mtime_ns, st.st_size)
+                if current == signature:
+                    continue
+
+                self._files[module_id] = (current, _catalog_entry(module_id, path))
+                self.reparsed += 1
+                changed = True
+
+            if changed:
+                entries = tuple(
+                    entry
+                    for _, (_, entry) in sorted(self._files.items())
+                    if entry is not None
+                )
+                self._index = build_catalog_index(entries)
+                self._entries = entries
+
+            self._checked_at = time.monotonic()
+            return self._entries
+
+    async def arefresh(self) -> Tuple[dict, ...]:
+        """
+        Async variant of `refresh()`.
+
+        Returns immediately while the last check is fresh; otherwise the
+        filesystem checks run on the threadpool, once for all concurrent
+        callers.
+        """
+        if not self._due():
+            return self._entries
+        return await self._refreshes.do(None, lambda: run_in_threadpool(self.refresh))
+
+
+# Process-wide catalog used by the modules router.
+module_catalog = ModuleCatalog()
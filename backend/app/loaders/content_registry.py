@@ -0,0 +1,401 @@
+"""
+Shared content registry.
+
+This module keeps parsed content JSON in memory so that loaders and
+engines do not re-open and re-parse the same file on every request.
+
+Each file is parsed once and handed out as an immutable object. A cached
+entry is only reloaded when the file's mtime or size changes on disk.
+The registry is bounded (least-recently-used entries are evicted first)
+and keeps simple hit/miss counters for tuning.
+
+If a content snapshot is attached (see app.loaders.snapshot), misses are
+served from the memory-mapped snapshot instead of opening the file, as
+long as the file on disk still matches the snapshot.
+
+`swap()` replaces the whole cached set at once with content preloaded
+from a new snapshot; app.loaders.reload uses it to hot-reload content in
+every worker.
+
+Async callers use `aload()` / `acompiled()`. These serve recently
+validated entries without touching the filesystem, run any stat/read on
+the threadpool so the event loop never blocks on slow storage, and
+coalesce concurrent misses for the same file into a single read.
+Concurrent compiles of the same derived view are coalesced as well: async
+callers compile in the threadpool (keeping large compiles off the event
+loop), sync callers in their own thread.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import CONTENT_BYTES, CONTENT_IO
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+PathLike = Union[str, Path]
+
+# Default number of files kept in memory before the oldest are evicted.
+DEFAULT_MAX_ENTRIES = 256
+
+# Root of all training content. CONTENT_DIR points the app at another
+# content tree (e.g. a deploy checkout, or synthetic benchmark content).
+CONTENT_DIR = Path(os.environ.get("CONTENT_DIR") or Path(__file__).parent.parent / "content")
+
+# Async lookups trust an entry validated this recently (seconds) without a
+# new stat() call. Sync lookups always stat.
+DEFAULT_REVALIDATE_INTERVAL = 1.0
+
+# Marks a derived view that is not cached (compilers may return None).
+_MISSING = object()
+
+
+class FrozenDict(dict):
+    """
+    A dict that refuses mutation after construction.
+
+    Subclassing dict (rather than using MappingProxyType) keeps cached
+    content directly serializable by FastAPI and the json module.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached content is read-only.")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed JSON into read-only dicts and tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def _cache_key(path: PathLike) -> str:
+    """
+    Normalizes a path so that equivalent spellings share one cache entry.
+
+    Loaders resolve content paths differently (some via "..", some via
+    Path.parent); this is a purely lexical normalization with no syscalls.
+    """
+    return os.path.normpath(os.path.abspath(os.fspath(path)))
+
+
+def _signature(st: os.stat_result) -> Tuple[int, int]:
+    """Returns the (mtime, size) pair used to detect on-disk changes."""
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ContentRegistry:
+    """
+    Thread-safe, bounded cache of parsed content files.
+
+    Entries are keyed by resolved file path. Every lookup performs a single
+    stat() call to confirm the cached copy is still current; the file is
+    only opened and parsed again when its mtime or size has changed.
+
+    Derived views (indexes, compiled tables) can be cached alongside the raw
+    content via `compiled()`. They are rebuilt automatically whenever the
+    underlying file is reloaded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        revalidate_interval: float = DEFAULT_REVALIDATE_INTERVAL,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self.max_entries = max_entries
+        self.revalidate_interval = revalidate_interval
+        # path -> [signature, value, monotonic time of last validation]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._derived: Dict[Tuple[str, Callable], Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+        # Concurrent async loads of one path share a single read, and
+        # concurrent compiles of one view share a single compile (per
+        # event loop for async callers, across threads for sync ones).
+        self._loads = AsyncSingleFlight("content_load")
+        self._compiles = SingleFlight("content_compile")
+        self._acompiles = AsyncSingleFlight("content_compile")
+        # Optional memory-mapped snapshot (app.loaders.snapshot.ContentSnapshot)
+        self._snapshot = None
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.snapshot_hits = 0
+        self.swaps = 0
+
+    # --------------------------------------------------------
+    # Raw content
+    # --------------------------------------------------------
+
+    def load(self, path: PathLike) -> Any:
+        """
+        Returns the parsed, read-only content of a JSON file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If the file contains invalid JSON.
+        """
+        key = _cache_key(path)
+        signature = _signature(self._stat(key))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                entry[2] = time.monotonic()
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        # Parse outside the lock so a slow read does not block other files.
+        value = self._from_snapshot(key, signature)
+        if value is None:
+            value = self._parse(key)
+
+        with self._lock:
+            if entry is not None:
+                self.reloads += 1
+            self.misses += 1
+            self._entries[key] = [signature, value, time.monotonic()]
+            self._entries.move_to_end(key)
+            self._evict()
+
+        return value
+
+    async def aload(self, path: PathLike) -> Any:
+        """
+        Async variant of `load()` for use inside `async def` routes.
+
+        Entries validated within `revalidate_interval` are returned
+        immediately. Otherwise the stat/read runs on the threadpool, and
+        concurrent callers waiting on the same file share that one call.
+        """
+        key = _cache_key(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] < self.revalidate_interval:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        return await self._loads.do(key, lambda: run_in_threadpool(self.load, key))
+
+    def _from_snapshot(self, key: str, signature: Tuple[int, int]) -> Any:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return self._read_snapshot(snapshot, key, signature)
+
+    def _read_snapshot(self, snapshot, key: str, signature: Tuple[int, int]) -> Any:
+        body = snapshot.read(key, signature)
+        if body is None:
+            return None
+        self.snapshot_hits += 1
+        CONTENT_BYTES.inc("snapshot", amount=len(body))
+        started = time.perf_counter()
+        value = freeze(json.loads(body))
+        CONTENT_IO.observe(time.perf_counter() - started, "parse")
+        return value
+
+    def _stat(self, key: str) -> os.stat_result:
+        started = time.perf_counter()
+        try:
+            return os.stat(key)
+        finally:
+            CONTENT_IO.observe(time.perf_counter() - started, "stat")
+
+    def _parse(self, key: str) -> Any:
+        # Read and parse are timed separately to tell disk from CPU cost.
+        started = time.perf_counter()
+        with open(key, "rb") as f:
+            raw = f.read()
+        read_done = time.perf_counter()
+        value = freeze(json.loads(raw))
+        CONTENT_IO.observe(read_done - started, "read")
+        CONTENT_IO.observe(time.perf_counter() - read_done, "parse")
+        CONTENT_BYTES.inc("file", amount=len(raw))
+        return value
+
+    def _evict(self) -> None:
+        # Caller must hold the lock.
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            for derived_key in [k for k in self._derived if k[0] == old_key]:
+                del self._derived[derived_key]
+
+    # --------------------------------------------------------
+    # Derived views
+    # --------------------------------------------------------
+
+    def compiled(self, path: PathLike, compiler: Callable[[Any], Any]) -> Any:
+        """
+        Returns `compiler(content)` for a file, computed once per file version.
+
+        The compiler must be a pure function of the parsed content. Its
+        result is cached until the underlying file changes.
+        """
+        key = _cache_key(path)
+        source = self.load(key)
+        cached = self._cached_view(key, source, compiler)
+        if cached is not _MISSING:
+            return cached
+        # The source object is part of the key: callers holding an older
+        # version of the file never receive a view of a newer one.
+        return self._compiles.do(
+            (key, compiler, id(source)),
+            lambda: self._compile_view(key, source, compiler),
+        )
+
+    async def acompiled(self, path: PathLike, compiler: Callable[[Any], Any]) -> Any:
+        """
+        Async variant of `compiled()`; the file is loaded via `aload()` and
+        misses are compiled in the threadpool.
+        """
+        key = _cache_key(path)
+        source = await self.aload(key)
+        cached = self._cached_view(key, source, compiler)
+        if cached is not _MISSING:
+            return cached
+        return await self._acompiles.do(
+            (key, compiler, id(source)),
+            lambda: run_in_threadpool(self._compile_view, key, source, compiler),
+        )
+
+    def _cached_view(self, key: str, source: Any, compiler: Callable[[Any], Any]) -> Any:
+        with self._lock:
+            cached = self._derived.get((key, compiler))
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        return _MISSING
+
+    def _compile_view(self, key: str, source: Any, compiler: Callable[[Any], Any]) -> Any:
+        result = compiler(source)
+        with self._lock:
+            if key in self._entries:
+                self._derived[(key, compiler)] = (source, result)
+        return result
+
+    # --------------------------------------------------------
+    # Maintenance
+    # --------------------------------------------------------
+
+    def attach_snapshot(self, snapshot) -> None:
+        """
+        Serves cache misses from a memory-mapped ContentSnapshot.
+
+        Passing None detaches the current snapshot. Already-cached entries
+        are kept; they were parsed from identical bytes.
+        """
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is not None and previous is not snapshot:
+            previous.close()
+
+    def swap(self, snapshot) -> int:
+        """
+        Atomically replaces all cached content with content from `snapshot`.
+
+        Every snapshot file that still matches the disk (up to max_entries)
+        is parsed before the lock is taken, so requests keep being served
+        from the previous set until the new one is complete and never wait
+        on a re-parse. Derived views are rebuilt lazily from the new
+        objects.
+
+        The previous snapshot is not closed explicitly: in-flight reads may
+        still hold it, and it is unmapped once the last reference is gone.
+
+        Returns the number of preloaded files.
+        """
+        entries: "OrderedDict[str, list]" = OrderedDict()
+        for key in snapshot.keys():
+            if len(entries) >= self.max_entries:
+                break
+            try:
+                signature = _signature(self._stat(key))
+            except FileNotFoundError:
+                continue
+            value = self._read_snapshot(snapshot, key, signature)
+            if value is not None:
+                entries[key] = [signature, value, time.monotonic()]
+
+        with self._lock:
+            self._snapshot = snapshot
+            self._entries = entries
+            self._derived.clear()
+            self.swaps += 1
+
+        return len(entries)
+
+    def invalidate(self, path: PathLike | None = None) -> None:
+        """Drops one cached file (or everything when no path is given)."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._derived.clear()
+                return
+
+            key = _cache_key(path)
+            self._entries.pop(key, None)
+            for derived_key in [k for k in self._derived if k[0] == key]:
+                del self._derived[derived_key]
+
+    def stats(self) -> dict:
+        """Returns cache counters for diagnostics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "coalesced": self._loads.shared,
+                "snapshot_entries": len(self._snapshot) if self._snapshot is not None else 0,
+                "snapshot_hits": self.snapshot_hits,
+                "swaps": self.swaps,
+            }
+
+
+# Process-wide registry shared by all loaders and engines.
+registry = ContentRegistry()
+
+
+def load_content_json(path: PathLike) -> Any:
+    """Loads a content JSON file through the shared registry."""
+    return registry.load(path)
+
+
+async def aload_content_json(path: PathLike) -> Any:
+    """Async variant of `load_content_json()`."""
+    return await registry.aload(path)
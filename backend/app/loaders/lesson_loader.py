@@ -0,0 +1,31 @@
+"""
+Lesson loader utilities.
+
+Long-form lessons live in `content/lessons`. Each `<module_id>.json` file
+is a lesson module: its metadata plus a `lessons` outline. A lesson's
+steps are either inline in the outline or stored in their own file under
+`content/lessons/<module_id>/`, so opening one lesson does not require
+reading the others.
+
+Lesson files are read through the shared content registry by
+app/engines/lesson_engine.py; this module only resolves their paths.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.loaders.content_registry import CONTENT_DIR
+
+# Base directory where lesson JSON files are stored.
+LESSON_DIR = CONTENT_DIR / "lessons"
+
+
+def lesson_module_path(module_id: str) -> Path:
+    """Path of a lesson module's outline file."""
+    return LESSON_DIR / f"{module_id}.json"
+
+
+def lesson_file_path(module_id: str, filename: str) -> Path:
+    """Path of a lesson stored in its own file."""
+    return LESSON_DIR / module_id / filename
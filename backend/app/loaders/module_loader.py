@@ -4,14 +4,26 @@ Module loader utilities.
 This module is responsible for loading raw module JSON files from disk
 and returning them as Python dictionaries. It performs no validation
 or transformation of the data.
+
+Parsed files are cached in the shared content registry and returned
+as read-only objects; callers must not mutate them.
+
+A scenario index (scenario id -> scenario, plus the default scenario) is
+built once per module version so routers can look scenarios up in O(1).
 """
 
-import json
-from pathlib import Path
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping
+
+from app.loaders.content_registry import CONTENT_DIR, aload_content_json, load_content_json, registry
+from app.metrics import timed_loader
 
 # Base directory where module JSON files are stored.
-MODULE_DIR = Path(__file__).parent.parent / "content" / "modules"
+MODULE_DIR = CONTENT_DIR / "modules"
 
+@timed_loader("load_module_json")
 def load_module_json(module_id: str) -> dict:
     """
     Loads a module JSON file from disk and returns it as a dictionary.
@@ -24,5 +36,67 @@ def load_module_json(module_id: str) -> dict:
         json.JSONDecodeError: If the file contains invalid JSON.
     """
     path = MODULE_DIR / f"{module_id}.json"
-    with open(path, "r") as f:
-        return json.load(f)
\ No newline at end of file
+    return load_content_json(path)
+
+
+@timed_loader("aload_module_json")
+async def aload_module_json(module_id: str) -> dict:
+    """
+    Async variant of `load_module_json()` for `async def` routes.
+
+    Any file I/O runs off the event loop, and concurrent cold loads of the
+    same module share a single read.
+    """
+    path = MODULE_DIR / f"{module_id}.json"
+    return await aload_content_json(path)
+
+
+@dataclass(frozen=True)
+class ModuleIndex:
+    """
+    Load-time lookup structure for a single module.
+
+    Attributes:
+        module: The raw (read-only) module JSON.
+        scenarios: Scenario id -> scenario, in file order.
+        default_scenario: The module's first scenario, or None if it has none.
+    """
+
+    module: dict
+    scenarios: Mapping[str, dict]
+    default_scenario: dict | None
+
+
+def index_module(module: dict) -> ModuleIndex:
+    """
+    Builds a ModuleIndex from raw module JSON.
+
+    If two scenarios share an id, the first one wins (matching the
+    behavior of a linear scan).
+    """
+    scenarios: dict[str, dict] = {}
+    for scenario in module.get("scenarios", ()):
+        scenarios.setdefault(scenario.get("id"), scenario)
+
+    default = next(iter(scenarios.values()), None)
+    return ModuleIndex(module=module, scenarios=scenarios, default_scenario=default)
+
+
+@timed_loader("load_module_index")
+def load_module_index(module_id: str) -> ModuleIndex:
+    """
+    Returns the scenario index for a module, built once per file version.
+
+    Raises:
+        FileNotFoundError: If the module file does not exist.
+        json.JSONDecodeError: If the file contains invalid JSON.
+    """
+    path = MODULE_DIR / f"{module_id}.json"
+    return registry.compiled(path, index_module)
+
+
+@timed_loader("aload_module_index")
+async def aload_module_index(module_id: str) -> ModuleIndex:
+    """Async variant of `load_module_index()`."""
+    path = MODULE_DIR / f"{module_id}.json"
+    return await registry.acompiled(path, index_module)
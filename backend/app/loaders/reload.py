@@ -0,0 +1,237 @@
+"""
+Content hot reload, coordinated across uvicorn workers.
+
+Each worker caches parsed content in its own process (see
+app.loaders.content_registry). To push new content without restarting:
+
+1. `POST /admin/content/reload` reaches one worker. Holding an exclusive
+   file lock, it validates all content, builds a new snapshot file
+   (app.loaders.snapshot) and bumps the content generation stored in a
+   small sentinel file next to it.
+2. Every worker polls the sentinel (one stat() per interval). When the
+   generation moves forward, it maps the new snapshot and preloads it in
+   the background, then swaps its registry to the new set in one step.
+
+Content is parsed once, by the reloading worker, into a shared snapshot
+whose pages all workers map; nothing is re-read from individual files.
+Workers preload off the request path, with jittered polling so they do
+not all do it at the same instant, and keep serving the previous set
+until the swap, so requests never queue behind re-parses.
+
+The sentinel is JSON: {"generation": n, "snapshot": "/path/content-n.snapshot"}.
+It is written to a temporary file and renamed, so readers never see a
+partial write. Configure with:
+
+- CONTENT_GENERATION_FILE: sentinel path (default: system temp dir); all
+  workers of one deployment must share it.
+- CONTENT_RELOAD_POLL: poll interval in seconds (default 1; 0 disables).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.loaders.content_registry import ContentRegistry, registry
+from app.loaders.snapshot import CONTENT_DIR, ContentSnapshot, SnapshotError, build_snapshot
+from app.metrics import CONTENT_RELOADS, metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GENERATION_FILE = Path(tempfile.gettempdir()) / "server-training-content.generation"
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Snapshots older than this many generations are deleted after a reload.
+KEEP_GENERATIONS = 2
+
+
+@contextmanager
+def _exclusive_lock(sentinel: Path):
+    """
+    Serializes reloads across processes with an flock on `<sentinel>.lock`.
+
+    Without fcntl (e.g. on Windows) only one process is assumed.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(sentinel.with_name(sentinel.name + ".lock"), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_generation(sentinel: Path) -> Tuple[int, Optional[Path]]:
+    """
+    Returns (generation, snapshot path) from the sentinel file.
+
+    A missing or unreadable sentinel is generation 0 with no snapshot.
+    """
+    try:
+        with open(sentinel, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        snapshot = data.get("snapshot")
+        return int(data["generation"]), Path(snapshot) if snapshot else None
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0, None
+
+
+def _write_generation(sentinel: Path, generation: int, snapshot: Path) -> None:
+    tmp = sentinel.with_name(sentinel.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"generation": generation, "snapshot": str(snapshot)}, f)
+    os.replace(tmp, sentinel)
+
+
+def _remove_old_snapshots(folder: Path, generation: int) -> None:
+    # Workers still mapping a removed file keep their mapping (POSIX).
+    for path in folder.glob("content-*.snapshot"):
+        try:
+            if int(path.stem.split("-", 1)[1]) <= generation - KEEP_GENERATIONS:
+                path.unlink()
+        except (ValueError, OSError):
+            continue
+
+
+class ContentReloader:
+    """
+    Tracks this worker's content generation and applies newer ones.
+
+    Attributes:
+        generation: The generation this worker serves (0 until the first
+            reload it observes).
+    """
+
+    def __init__(
+        self,
+        registry: ContentRegistry,
+        sentinel: Path | None = None,
+        content_dir: Path = CONTENT_DIR,
+        poll_interval: float | None = None,
+    ):
+        if sentinel is None:
+            sentinel = Path(os.environ.get("CONTENT_GENERATION_FILE") or DEFAULT_GENERATION_FILE)
+        if poll_interval is None:
+            poll_interval = float(os.environ.get("CONTENT_RELOAD_POLL", DEFAULT_POLL_INTERVAL))
+
+        self.registry = registry
+        self.sentinel = sentinel
+        self.content_dir = content_dir
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self._seen: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Adopts the current generation without reloading.
+
+        Called at worker startup: content was just read from disk (or the
+        deploy snapshot), so only later reloads need applying.
+        """
+        self._seen = self._sentinel_signature()
+        self.generation, _ = read_generation(self.sentinel)
+
+    def reload(self) -> dict:
+        """
+        Validates content, publishes it as a new generation and applies it
+        to this worker.
+
+        Returns the new generation and the number of files it holds.
+
+        Raises:
+            SnapshotError: If any content file is invalid; the current
+                generation stays in place.
+        """
+        with _exclusive_lock(self.sentinel):
+            generation = read_generation(self.sentinel)[0] + 1
+            snapshot_path = self.sentinel.with_name(f"content-{generation}.snapshot")
+            header = build_snapshot(snapshot_path, self.content_dir)
+            _write_generation(self.sentinel, generation, snapshot_path)
+            _remove_old_snapshots(self.sentinel.parent, generation)
+
+        self._apply(generation, snapshot_path, "admin")
+        return {"generation": generation, "files": len(header["files"])}
+
+    def poll(self) -> bool:
+        """
+        Applies a newer generation if the sentinel changed.
+
+        Costs one stat() when nothing changed. Returns True if this worker
+        swapped to new content.
+        """
+        signature = self._sentinel_signature()
+        if signature == self._seen:
+            return False
+        self._seen = signature
+
+        generation, snapshot_path = read_generation(self.sentinel)
+        if generation <= self.generation:
+            return False
+        return self._apply(generation, snapshot_path, "watch")
+
+    def _apply(self, generation: int, snapshot_path: Optional[Path], trigger: str) -> bool:
+        with self._lock:
+            if generation <= self.generation:
+                return False
+            try:
+                snapshot = ContentSnapshot(snapshot_path, self.content_dir)
+            except (OSError, TypeError, SnapshotError):
+                # Snapshot missing or unreadable: fall back to re-reading files.
+                self.registry.invalidate()
+            else:
+                self.registry.swap(snapshot)
+            self.generation = generation
+            CONTENT_RELOADS.inc(trigger)
+            return True
+
+    def _sentinel_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.sentinel)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    async def watch(self) -> None:
+        """
+        Polls for new generations until cancelled.
+
+        Polls are jittered so workers started together spread out their
+        preloads; the stat and preload run on the threadpool.
+        """
+        if self.poll_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+            try:
+                await run_in_threadpool(self.poll)
+            except Exception:
+                logger.exception("Content reload failed; keeping generation %s", self.generation)
+
+
+# Process-wide reloader for the shared registry.
+reloader = ContentReloader(registry)
+
+
+def _generation_metric():
+    yield "content_generation", "gauge", "Content generation served by this worker.", reloader.generation
+
+
+metrics.add_collector(_generation_metric)
@@ -1,17 +1,19 @@
-# Brings in Python's built-in JSON module.
-import json
-# Imports the Path class -- a modern way to work with file paths.
-from pathlib import Path
+# Shared cache so each scenario file is parsed once (until it changes on disk).
+from app.loaders.content_registry import CONTENT_DIR, aload_content_json, load_content_json
 
 # Points to the our base directory for modules where their JSON files live.
-SCENARIO_DIR = Path(__file__).parent.parent / "content" / "scenarios"
+SCENARIO_DIR = CONTENT_DIR / "scenarios"
 
 """Accepts the module name as input, loads the matching JSON file, and returns
    the JSON file as a Python dictionary."""
 def load_scenario_json(scenario_id: str) -> dict:
     # Builds an exact file path to whatever is called.
     path = SCENARIO_DIR / f"{scenario_id}.json"
-    # Opens the file located at path in read mode. 'With' auto closes file.
-    with open(path, "r") as f:
-        # Reads JSON file and parses it into a Python dictionary.
-        return json.load(f)
\ No newline at end of file
+    # Returns the cached, read-only parse of the file (re-read only if it changed).
+    return load_content_json(path)
+
+"""Async variant for `async def` routes: file I/O runs off the event loop and
+   concurrent loads of the same scenario share one read."""
+async def aload_scenario_json(scenario_id: str) -> dict:
+    path = SCENARIO_DIR / f"{scenario_id}.json"
+    return await aload_content_json(path)
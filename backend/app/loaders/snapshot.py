@@ -0,0 +1,336 @@
+"""
+Content snapshot builder and reader.
+
+A snapshot is a single binary file holding every content JSON file
+(modules, scenarios, quizzes, lessons), validated and re-encoded as
+compact JSON, plus an offset index. It is built once at deploy/startup
+and memory-mapped by each worker, so all uvicorn workers share the same
+page-cache pages and no worker has to open individual content files.
+
+File layout (all integers little-endian):
+
+    8 bytes   magic  b"STSNAP01"
+    4 bytes   header length N
+    N bytes   header (UTF-8 JSON):
+              {"version": 1, "files": {relpath: [offset, length, mtime_ns, size]}}
+    ...       concatenated compact JSON documents (offsets are absolute)
+
+The format contains no pickled data. Each file entry records the mtime and
+size of its source file at build time; the content registry only serves a
+snapshot entry while those still match the file on disk.
+
+Build from the backend/ directory:
+
+    python -m app.loaders.snapshot build --output content.snapshot
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.engines.lesson_engine import compile_lesson
+from app.engines.module_engine import compile_module
+from app.engines.scenario_engine import ScenarioGraph, ScenarioGraphError, compile_scenario_graph
+from app.loaders.content_registry import CONTENT_DIR
+from app.models.content import ContentError, parse_lesson_module, parse_module, parse_quiz
+
+# Content folders included in snapshots.
+CONTENT_KINDS = ("modules", "scenarios", "quizzes", "lessons")
+
+MAGIC = b"STSNAP01"
+FORMAT_VERSION = 1
+_HEADER_LEN = struct.Struct("<I")
+
+
+class SnapshotError(Exception):
+    """Raised when content fails validation or a snapshot file is invalid."""
+
+
+# ============================================================
+# Validation
+# ============================================================
+
+def validate_content(kind: str, data, where: str, warnings: Optional[List[str]] = None) -> List[str]:
+    """
+    Checks a content file against its typed model (see app.models.content)
+    and compiles it as the engines would, so content with e.g. a step type
+    that has no registered handler is rejected too.
+
+    Returns a list of human-readable problems (empty when valid). Findings
+    that do not stop content from being served (branching scenario cycles
+    and unreachable steps) are appended to `warnings`, if given.
+    """
+    problems: List[str] = []
+
+    try:
+        if kind == "modules":
+            compile_module(parse_module(data, where))
+        elif kind == "quizzes":
+            parse_quiz(data, where)
+        elif kind == "scenarios":
+            graph = compile_scenario_graph(data)
+            if warnings is not None:
+                warnings.extend(scenario_warnings(graph, where))
+        elif kind == "lessons":
+            # The outline, then every inline lesson's steps.
+            for entry in parse_lesson_module(data, where).lessons:
+                if entry.file is None:
+                    lesson = {"id": entry.id, "title": entry.title, "steps": entry.raw_steps}
+                    compile_lesson(lesson, f"{where} lesson '{entry.id}'")
+        elif kind == "lesson_files":
+            compile_lesson(data, where)
+    except ContentError as exc:
+        problems.extend(exc.problems)
+    except ScenarioGraphError as exc:
+        # Before ValueError, its base class, to keep one entry per problem.
+        problems.extend(f"{where}: {problem}" for problem in exc.problems)
+    except ValueError as exc:
+        # Unknown step types (no handler registered).
+        problems.append(f"{where}: {exc}")
+
+    return problems
+
+
+def scenario_warnings(graph: ScenarioGraph, where: str) -> List[str]:
+    """Cycles and unreachable steps of a branching scenario, as warnings."""
+    found = []
+    if graph.has_cycles:
+        found.append(f"{where}: steps can be revisited (cycle); make sure this is an intended retry branch")
+    if graph.unreachable:
+        found.append(f"{where}: unreachable from the start step: {', '.join(graph.unreachable)}")
+    return found
+
+
+def check_content(content_dir: Path = CONTENT_DIR, warnings: Optional[List[str]] = None) -> List[str]:
+    """
+    Validates every content file; returns all problems found.
+
+    Run at startup so malformed content is rejected before serving.
+    Warnings (see `validate_content`) are appended to `warnings`, if given.
+    """
+    problems: List[str] = []
+    for kind, path in iter_content_files(content_dir):
+        rel = path.relative_to(content_dir).as_posix()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as exc:
+            problems.append(f"{rel}: invalid JSON ({exc})")
+            continue
+        problems.extend(validate_content(kind, data, rel, warnings))
+    return problems
+
+
+# ============================================================
+# Building
+# ============================================================
+
+def iter_content_files(content_dir: Path = CONTENT_DIR):
+    """
+    Yields (kind, path) for every JSON content file, in a stable order.
+
+    Lessons stored in their own files (`lessons/<module_id>/*.json`) are
+    yielded with kind "lesson_files".
+    """
+    for kind in CONTENT_KINDS:
+        folder = content_dir / kind
+        if not folder.is_dir():
+            continue
+        for path in sorted(folder.glob("*.json")):
+            yield kind, path
+        if kind == "lessons":
+            for path in sorted(folder.glob("*/*.json")):
+                yield "lesson_files", path
+
+
+def build_snapshot(output: Path, content_dir: Path = CONTENT_DIR) -> dict:
+    """
+    Validates all content and writes a snapshot file.
+
+    The file is written to a temporary name and atomically renamed, so
+    workers never map a half-written snapshot.
+
+    Returns the snapshot header.
+
+    Raises:
+        SnapshotError: If any content file is invalid. All problems are
+            reported together.
+    """
+    problems: List[str] = []
+    documents: List[Tuple[str, bytes, os.stat_result]] = []
+
+    for kind, path in iter_content_files(content_dir):
+        rel = path.relative_to(content_dir).as_posix()
+        st = path.stat()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as exc:
+            problems.append(f"{rel}: invalid JSON ({exc})")
+            continue
+
+        problems.extend(validate_content(kind, data, rel))
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        documents.append((rel, body, st))
+
+    if problems:
+        raise SnapshotError("Content validation failed:\n" + "\n".join(problems))
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # iterate until the encoded header size is stable.
+    header_size = 0
+    while True:
+        offset = len(MAGIC) + _HEADER_LEN.size + header_size
+        files: Dict[str, list] = {}
+        for rel, body, st in documents:
+            files[rel] = [offset, len(body), st.st_mtime_ns, st.st_size]
+            offset += len(body)
+        header = {"version": FORMAT_VERSION, "files": files}
+        encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(encoded) == header_size:
+            break
+        header_size = len(encoded)
+
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LEN.pack(len(encoded)))
+        f.write(encoded)
+        for _, body, _ in documents:
+            f.write(body)
+    os.replace(tmp, output)
+
+    return header
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+class ContentSnapshot:
+    """
+    A memory-mapped snapshot file.
+
+    Lookups are keyed by absolute, normalized content path (the same keys
+    the content registry uses) and only succeed when the caller's
+    (mtime_ns, size) signature matches the one recorded at build time.
+    """
+
+    def __init__(self, path: Path, content_dir: Path = CONTENT_DIR):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{self.path}: empty snapshot file")
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise SnapshotError(f"{self.path}: not a content snapshot")
+
+        start = len(MAGIC) + _HEADER_LEN.size
+        (header_len,) = _HEADER_LEN.unpack_from(self._map, len(MAGIC))
+        header = json.loads(self._map[start:start + header_len])
+
+        if header.get("version") != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"{self.path}: unsupported snapshot version {header.get('version')}")
+
+        root = os.path.normpath(os.path.abspath(content_dir))
+        self._index: Dict[str, Tuple[int, int, Tuple[int, int]]] = {
+            os.path.normpath(os.path.join(root, rel)): (offset, length, (mtime_ns, size))
+            for rel, (offset, length, mtime_ns, size) in header["files"].items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def keys(self) -> List[str]:
+        """Returns the content paths stored in the snapshot."""
+        return list(self._index)
+
+    def read(self, key: str, signature: Tuple[int, int]) -> Optional[bytes]:
+        """
+        Returns the stored JSON bytes for a file, or None if the file is not
+        in the snapshot or has changed since the snapshot was built.
+        """
+        entry = self._index.get(key)
+        if entry is None or entry[2] != signature:
+            return None
+        offset, length, _ = entry
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+def open_snapshot_from_env() -> Optional[ContentSnapshot]:
+    """
+    Opens the snapshot named by the CONTENT_SNAPSHOT environment variable.
+
+    Returns None when the variable is unset or the file does not exist.
+    """
+    path = os.environ.get("CONTENT_SNAPSHOT")
+    if not path or not os.path.exists(path):
+        return None
+    return ContentSnapshot(Path(path))
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect a content snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="validate content and write a snapshot")
+    build.add_argument("--output", default="content.snapshot")
+
+    info = sub.add_parser("info", help="list the files in a snapshot")
+    info.add_argument("path")
+
+    sub.add_parser("check", help="validate content without writing a snapshot")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        warnings: List[str] = []
+        problems = check_content(warnings=warnings)
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        return 1 if problems else 0
+
+    if args.command == "build":
+        try:
+            header = build_snapshot(Path(args.output))
+        except SnapshotError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print(f"Wrote {len(header['files'])} files to {args.output}")
+        return 0
+
+    snapshot = ContentSnapshot(Path(args.path))
+    for key in sorted(snapshot._index):
+        offset, length, _ = snapshot._index[key]
+        print(f"{length:>8}  {key}")
+    snapshot.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
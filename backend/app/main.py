@@ -5,16 +5,109 @@ This module is responsible only for:
 - Creating the FastAPI application instance
 - Configuring global middleware
 - Registering API routers
-- Exposing a basic health check endpoint
+- Exposing liveness and readiness health checks
 
 Business logic, data loading, and scenario execution are intentionally
 delegated to routers, engines, and loaders.
+
+Optional subsystems (content validation and snapshots, hot reload and the
+admin API, analytics, SQLite backends, extra codecs) are imported only
+when enabled or first used, and startup phases are timed (app/startup.py),
+so cold starts stay fast as the backend grows.
 """
 
-from fastapi import FastAPI
+import time
+
+# Measures how long importing the application takes (the "import" phase).
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+
+from app import startup
+from app.loaders.content_registry import registry
+from app.metrics import MetricsMiddleware
+from app.ratelimit import rate_limit
+from app.responses import MIN_COMPRESS_SIZE
+from app.routers import modules, lessons, scenarios, quiz, progress, metrics
+from app.stores.progress_store import get_progress_store
+
+_DISABLED = ("0", "off", "false", "no")
+
+logger = logging.getLogger(__name__)
+
+
+def _admin_enabled() -> bool:
+    # The admin API and hot reload are only loaded when an admin token is set.
+    return bool(os.environ.get("ADMIN_TOKEN"))
+
+
+# ============================================================
+# Lifespan
+# ============================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+
+    # Refuse to start with malformed content, so errors surface at deploy
+    # time rather than as failed requests (CONTENT_VALIDATION=off skips it).
+    if os.environ.get("CONTENT_VALIDATION", "on").lower() not in _DISABLED:
+        with startup.phase("validate"):
+            from app.loaders.snapshot import check_content
+            from app.models.content import ContentError
+
+            warnings = []
+            problems = check_content(warnings=warnings)
+            for warning in warnings:
+                logger.warning("Content: %s", warning)
+            if problems:
+                raise ContentError(problems)
+
+    # Memory-map the prebuilt content snapshot, if one is configured
+    # (CONTENT_SNAPSHOT). Workers then share its pages instead of each
+    # reading content files on first use.
+    if os.environ.get("CONTENT_SNAPSHOT"):
+        with startup.phase("snapshot"):
+            from app.loaders.snapshot import open_snapshot_from_env
+
+            registry.attach_snapshot(open_snapshot_from_env())
+
+    # Follow content generations published by POST /admin/content/reload
+    # in any worker.
+    if _admin_enabled():
+        with startup.phase("reload"):
+            from app.loaders.reload import reloader
+
+            reloader.start()
+            tasks.append(asyncio.create_task(reloader.watch()))
+
+    # Pre-parse popular content once the worker is accepting traffic;
+    # /health/ready reports ready when it is done.
+    if startup.warmup_enabled():
+        tasks.append(asyncio.create_task(startup.warm_up()))
+    else:
+        startup.state.mark_ready()
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    registry.attach_snapshot(None)
+    # Persist any buffered progress writes before the worker exits.
+    get_progress_store().close()
+    # Write queued quiz submissions to the analytics log (if any were made).
+    from app.stores.analytics_store import close_quiz_analytics
+
+    close_quiz_analytics()
 
-from app.routers import modules, scenarios, quiz
 
 
 # ============================================================
@@ -24,6 +117,7 @@ from app.routers import modules, scenarios, quiz
 app = FastAPI(
     title="Server Training Backend",
     version="0.1.0",  # Backend API version, not tied to training content versions
+    lifespan=lifespan,
 )
 
 # ============================================================
@@ -40,20 +134,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresses dynamic JSON (step renders, quiz results, NDJSON streams).
+# Cached payloads are precompressed and already carry Content-Encoding,
+# which the middleware passes through untouched; SSE is excluded.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=MIN_COMPRESS_SIZE,
+    compresslevel=6,
+)
+
+# Per-route request counts and latency histograms, served at /metrics.
+# Added last so it wraps the other middleware and times the full response.
+app.add_middleware(MetricsMiddleware)
+
 
 # ============================================================
 # API routers
 # ============================================================
-# Routers are organized by domain responsibility (modules, scenarios, quizzes)
+# Routers are organized by domain responsibility (modules, lessons, scenarios, quizzes,
+# session progress, metrics, admin)
 # and should remain thin request/response layers.
+# Client-facing routers are rate limited per client and route (app/ratelimit.py).
+
+app.include_router(modules.router, dependencies=[Depends(rate_limit)])
+app.include_router(lessons.router, dependencies=[Depends(rate_limit)])
+app.include_router(scenarios.router, dependencies=[Depends(rate_limit)])
+app.include_router(quiz.router, dependencies=[Depends(rate_limit)])
+app.include_router(progress.router, dependencies=[Depends(rate_limit)])
+app.include_router(metrics.router)
 
-app.include_router(modules.router)
-app.include_router(scenarios.router)
-app.include_router(quiz.router)
+if _admin_enabled():
+    from app.routers import admin
+
+    app.include_router(admin.router)
 
 
 # ============================================================
-# Health check
+# Health checks
 # ============================================================
 
 @app.get("/")
@@ -62,3 +179,26 @@ def health_check():
     Basic health check endpoint used to verify that the backend is running.
     """
     return {"status": "ok", "message": "Server Training Backend Running"}
+
+
+@app.get("/health/live")
+def liveness():
+    """
+    Liveness probe: the worker is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: startup has finished and content has been warmed up.
+
+    Returns 503 while the warm-up is still running, with the startup phase
+    timings in both cases.
+    """
+    report = startup.state.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+startup.state.record("import", time.perf_counter() - _import_started)
@@ -0,0 +1,367 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Collects, per worker:
+- request counts, error counts and latency histograms per route template
+  (recorded by `MetricsMiddleware`),
+- loader call latency (`timed_loader` on load_module_json, load_quiz, ...),
+- content I/O split into phases: stat, read (with bytes read) and parse,
+- payload rendering split into serialize and compress,
+- time spent in each startup phase (see app/startup.py).
+
+Together these separate disk, parse and serialization cost. `render()`
+produces the Prometheus text format served at `/metrics`.
+
+An optional stack-sampling profiler (`SamplingProfiler`) can be run on
+demand to see where request time goes inside Python; see
+app/routers/metrics.py.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets (seconds): 100 µs up to 10 s.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class CounterMetric:
+    """A monotonically increasing counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class HistogramMetric:
+    """A cumulative-bucket histogram, optionally labelled."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            running = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                le = _labels(self.label_names, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {running}"
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total!r}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+class GaugeMetric:
+    """A value that can go up and down, optionally labelled."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class MetricsRegistry:
+    """Holds metrics and extra collectors, and renders them as text."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, float]]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> CounterMetric:
+        metric = CounterMetric(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> GaugeMetric:
+        metric = GaugeMetric(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> HistogramMetric:
+        metric = HistogramMetric(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, float]]]) -> None:
+        """
+        Registers a callable evaluated at scrape time. It yields
+        (name, type, help, value) tuples for unlabelled gauges/counters.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            for name, kind, help, value in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_ERRORS = metrics.counter(
+    "http_request_errors_total", "HTTP requests that failed with a 5xx or an exception.", ("method", "route")
+)
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+LOADER_LATENCY = metrics.histogram(
+    "content_loader_duration_seconds", "Latency of content loader calls.", ("loader",)
+)
+CONTENT_IO = metrics.histogram(
+    "content_io_duration_seconds", "Content file I/O time by phase (stat, read, parse).", ("phase",)
+)
+CONTENT_BYTES = metrics.counter(
+    "content_bytes_read_total", "Bytes of content read, by source (file or snapshot).", ("source",)
+)
+CONTENT_RELOADS = metrics.counter(
+    "content_reloads_total", "Content hot reloads applied by this worker, by trigger (admin or watch).", ("trigger",)
+)
+ANALYTICS_EVENTS = metrics.counter(
+    "quiz_analytics_events_total", "Quiz submissions sent to analytics, by outcome (logged, dropped, failed).", ("outcome",)
+)
+SINGLEFLIGHT_CALLS = metrics.counter(
+    "singleflight_calls_total", "Coalesced computations by group and role (leader computed, shared joined).", ("group", "role")
+)
+RATE_LIMIT_DECISIONS = metrics.counter(
+    "rate_limit_decisions_total", "Rate limiter decisions by route template (allowed or limited).", ("route", "decision")
+)
+STARTUP_SECONDS = metrics.gauge(
+    "startup_phase_seconds", "Time spent in each startup phase (import, validate, ..., warmup).", ("phase",)
+)
+RENDER_LATENCY = metrics.histogram(
+    "payload_render_duration_seconds", "Cached payload rendering time by phase (serialize, compress).", ("phase",)
+)
+
+
+# ============================================================
+# Hooks
+# ============================================================
+
+def timed_loader(name: str):
+    """
+    Decorator recording a loader's latency under `loader=name`.
+
+    Works for both sync and async loaders.
+    """
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    LOADER_LATENCY.observe(time.perf_counter() - started, name)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                LOADER_LATENCY.observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    return decorate
+
+
+# ============================================================
+# Middleware
+# ============================================================
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route request metrics.
+
+    Routes are labelled by their template (e.g. `/quiz/{quiz_id}`), which
+    Starlette stores in the scope once routing has happened, so label
+    cardinality stays bounded. Latency covers the whole response, including
+    streamed bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, template)
+            HTTP_REQUESTS.inc(method, template, str(status))
+            if status >= 500:
+                HTTP_ERRORS.inc(method, template)
+
+
+# ============================================================
+# Sampling profiler
+# ============================================================
+
+class SamplingProfiler:
+    """
+    Periodically samples every thread's Python stack.
+
+    Samples are aggregated as collapsed stacks ("a;b;c count"), the input
+    format of common flame graph tools. Sampling runs in a daemon thread
+    and costs one `sys._current_frames()` call per interval.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def collapsed(self, limit: Optional[int] = None) -> str:
+        """Returns the most common stacks in collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common(limit))
@@ -0,0 +1,561 @@
+"""
+Typed content models.
+
+Modules, lessons, scenarios, steps and quizzes are validated once, when a
+file is loaded, and compiled into frozen, slotted dataclasses. Engines
+work on these instead of nested dicts, so:
+- malformed content is reported (with every problem and its location)
+  when it is loaded or at startup, not as a KeyError mid-request,
+- handlers read typed attributes without defensive `.get()` calls,
+- large content trees take far less memory than nested dicts.
+
+Known field aliases are normalized here. For example, text steps may store
+their body under "text" (scenario modules) or "content" (lessons); the
+model always exposes it as `content`.
+
+Step types without a model (e.g. ones added by a custom step handler) are
+kept as GenericStep, a read-only mapping of their fields.
+
+Scenario steps may carry per-style variants (`"variants": {style:
+{field: value}}`), overriding fields for learners of one quiz style. Each
+variant is validated as a step of its own; a Scenario keeps, per style
+that has any, the full step list with variants applied.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, List, Mapping, Optional, Tuple, Union
+
+from app.loaders.content_registry import freeze
+
+
+# Content from the registry is frozen (lists become tuples); accept both.
+_LIST = (list, tuple)
+
+
+class ContentError(ValueError):
+    """Raised when content fails validation; lists every problem found."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("Invalid content:\n" + "\n".join(problems))
+        self.problems = problems
+
+
+class _Problems:
+    """
+    Collects validation problems with their location.
+
+    Locations are strings or tuples of parts; tuples are only joined into
+    text when a problem is reported, keeping the valid path cheap.
+    """
+
+    def __init__(self):
+        self.items: List[str] = []
+
+    def add(self, where, message: str) -> None:
+        if isinstance(where, tuple):
+            where = " ".join(map(str, where))
+        self.items.append(f"{where}: {message}")
+
+    def raise_if_any(self) -> None:
+        if self.items:
+            raise ContentError(self.items)
+
+
+def _field(data: Mapping, key: str, types, where: str, problems: _Problems, required: bool = True):
+    value = data.get(key)
+    if value is None:
+        if required:
+            problems.add(where, f"missing '{key}'")
+        return None
+    if not isinstance(value, types) or isinstance(value, bool) and bool not in _as_tuple(types):
+        problems.add(where, f"'{key}' has the wrong type ({type(value).__name__})")
+        return None
+    return value
+
+
+def _as_tuple(types) -> tuple:
+    return types if isinstance(types, tuple) else (types,)
+
+
+def _strings(data: Mapping, key: str, where: str, problems: _Problems, required: bool = True) -> Tuple[str, ...]:
+    values = _field(data, key, _LIST, where, problems, required) or ()
+    if not all(isinstance(v, str) for v in values):
+        problems.add(where, f"'{key}' must be a list of strings")
+        return ()
+    return tuple(values)
+
+
+# ============================================================
+# Steps
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class TextStep:
+    content: str
+
+    type: ClassVar[str] = "text"
+
+    @classmethod
+    def parse(cls, data: Mapping, where: str, problems: _Problems) -> "TextStep":
+        if "content" not in data and "text" not in data:
+            problems.add(where, "missing 'content' (or 'text')")
+            return cls(content="")
+        key = "content" if "content" in data else "text"
+        return cls(content=_field(data, key, str, where, problems))
+
+
+@dataclass(frozen=True, slots=True)
+class ReflectionStep:
+    prompt: str
+
+    type: ClassVar[str] = "reflection"
+
+    @classmethod
+    def parse(cls, data: Mapping, where: str, problems: _Problems) -> "ReflectionStep":
+        return cls(prompt=_field(data, "prompt", str, where, problems))
+
+
+@dataclass(frozen=True, slots=True)
+class QuizStep:
+    """Either a reference to a quiz-service quiz or one inline question."""
+
+    quiz_id: Optional[str]
+    question: Optional[str]
+    options: Tuple[str, ...]
+    correct_index: Optional[int]
+
+    type: ClassVar[str] = "quiz"
+
+    @classmethod
+    def parse(cls, data: Mapping, where: str, problems: _Problems) -> "QuizStep":
+        if "quiz_id" in data:
+            return cls(_field(data, "quiz_id", str, where, problems), None, (), None)
+
+        options = _strings(data, "options", where, problems)
+        correct_index = _field(data, "correct_index", int, where, problems, required=False)
+        if correct_index is not None and not 0 <= correct_index < len(options):
+            problems.add(where, f"'correct_index' {correct_index} is out of range")
+        return cls(None, _field(data, "question", str, where, problems), options, correct_index)
+
+
+@dataclass(frozen=True, slots=True)
+class QuizResultStep:
+    """
+    Personalized quiz feedback, or fixed inline feedback text.
+
+    `coaching` is optional text shown with the result, usually set per
+    style through variants.
+    """
+
+    correct_text: Optional[str]
+    incorrect_text: Optional[str]
+    coaching: Optional[str] = None
+
+    type: ClassVar[str] = "quiz_result"
+
+    @property
+    def inline(self) -> bool:
+        return self.correct_text is not None or self.incorrect_text is not None
+
+    @classmethod
+    def parse(cls, data: Mapping, where: str, problems: _Problems) -> "QuizResultStep":
+        return cls(
+            correct_text=_field(data, "correct_text", str, where, problems, required=False),
+            incorrect_text=_field(data, "incorrect_text", str, where, problems, required=False),
+            coaching=_field(data, "coaching", str, where, problems, required=False),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class GenericStep:
+    """A step type without a model: its fields, read-only."""
+
+    type: str
+    fields: Mapping[str, Any]
+
+    def __getitem__(self, key: str) -> Any:
+        return self.fields[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.fields
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.fields.get(key, default)
+
+
+Step = Union[TextStep, ReflectionStep, QuizStep, QuizResultStep, GenericStep]
+
+# Step type -> model. Extend with `register_step_model`.
+STEP_MODELS: Dict[str, Any] = {
+    model.type: model for model in (TextStep, ReflectionStep, QuizStep, QuizResultStep)
+}
+
+
+def register_step_model(model):
+    """
+    Class decorator registering a typed model for a step type.
+
+    The model needs a `type` ClassVar and a `parse(data, where, problems)`
+    classmethod.
+    """
+    STEP_MODELS[model.type] = model
+    return model
+
+
+def _parse_step(data: Any, where: str, problems: _Problems) -> Optional[Step]:
+    if not isinstance(data, dict):
+        problems.add(where, "step must be an object")
+        return None
+    step_type = data.get("type")
+    if not isinstance(step_type, str):
+        problems.add(where, "missing step 'type'")
+        return None
+    model = STEP_MODELS.get(step_type)
+    if model is None:
+        return GenericStep(type=step_type, fields=freeze({k: v for k, v in data.items() if k != "variants"}))
+    return model.parse(data, where, problems)
+
+
+def parse_step(data: Mapping) -> Step:
+    """
+    Validates one raw step.
+
+    Raises:
+        ContentError: If the step is malformed.
+    """
+    problems = _Problems()
+    step = _parse_step(data, "step", problems)
+    problems.raise_if_any()
+    return step
+
+
+def _parse_steps(data: Mapping, where: str, problems: _Problems) -> Tuple[Step, ...]:
+    raw_steps = _field(data, "steps", _LIST, where, problems) or ()
+    return tuple(_parse_step(s, (where, "step", i), problems) for i, s in enumerate(raw_steps))
+
+
+# ============================================================
+# Style variants
+# ============================================================
+
+# Quiz styles (see content/quizzes/server_style.json) steps can vary by.
+STYLES = ("strategist", "guide", "anchor", "spark")
+
+# Shared by the (many) scenarios without variants.
+_NO_VARIANTS: Mapping[str, Tuple[Step, ...]] = freeze({})
+
+
+def apply_variant(step: Mapping, style: str) -> Mapping:
+    """
+    Returns a raw step as seen by learners of `style`: its
+    `variants[style]` overrides applied and `variants` removed. Steps
+    without variants are returned as-is.
+    """
+    variants = step.get("variants")
+    if variants is None:
+        return step
+    styled = {k: v for k, v in step.items() if k != "variants"}
+    if isinstance(variants, Mapping) and isinstance(variants.get(style), Mapping):
+        styled.update(variants[style])
+    return styled
+
+
+def _parse_variants(
+    raw_steps: Any,
+    steps: Tuple[Step, ...],
+    where: str,
+    problems: _Problems,
+) -> Dict[str, Tuple[Step, ...]]:
+    """
+    Validates step variants. Returns style -> the full step list for that
+    style, for styles with at least one variant; unchanged steps are
+    shared with `steps`.
+    """
+    overrides: Dict[str, Dict[int, Step]] = {}
+    for i, raw in enumerate(raw_steps if isinstance(raw_steps, _LIST) else ()):
+        if not isinstance(raw, dict) or "variants" not in raw:
+            continue
+        at = (where, "step", i)
+        variants = _field(raw, "variants", dict, at, problems) or {}
+        for style, override in variants.items():
+            variant_at = (where, "step", i, "variant", style)
+            if style not in STYLES:
+                problems.add(variant_at, f"unknown style (expected one of {', '.join(STYLES)})")
+                continue
+            if not isinstance(override, dict):
+                problems.add(variant_at, "variant must be an object")
+                continue
+            if override.get("type", raw.get("type")) != raw.get("type"):
+                problems.add(variant_at, "a variant cannot change the step 'type'")
+                continue
+            step = _parse_step(apply_variant(raw, style), variant_at, problems)
+            if step is not None:
+                overrides.setdefault(style, {})[i] = step
+
+    if not overrides:
+        return _NO_VARIANTS
+    return {
+        style: tuple(overrides[style].get(i, step) for i, step in enumerate(steps))
+        for style in STYLES
+        if style in overrides
+    }
+
+
+# ============================================================
+# Modules
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """
+    A scenario and its steps.
+
+    `variants` maps a style to the scenario's steps with that style's
+    variants applied (only styles with variants are present).
+    """
+
+    id: str
+    title: str
+    steps: Tuple[Step, ...]
+    variants: Mapping[str, Tuple[Step, ...]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class Module:
+    id: str
+    title: str
+    description: Optional[str]
+    estimated_minutes: Optional[float]
+    version: Optional[str]
+    tags: Tuple[str, ...]
+    scenarios: Tuple[Scenario, ...]
+
+    def scenario(self, scenario_id: str) -> Optional[Scenario]:
+        for scenario in self.scenarios:
+            if scenario.id == scenario_id:
+                return scenario
+        return None
+
+
+def parse_module(data: Any, where: str = "module") -> Module:
+    """
+    Validates raw module JSON and compiles it into a Module.
+
+    Raises:
+        ContentError: Listing every problem found.
+    """
+    problems = _Problems()
+    if not isinstance(data, dict):
+        problems.add(where, "top level must be an object")
+        problems.raise_if_any()
+
+    scenarios = []
+    seen = set()
+    for i, raw in enumerate(_field(data, "scenarios", _LIST, where, problems, required=False) or ()):
+        at = f"{where} scenario {i}"
+        if not isinstance(raw, dict):
+            problems.add(at, "scenario must be an object")
+            continue
+        scenario_id = _field(raw, "id", str, at, problems)
+        if scenario_id in seen:
+            problems.add(at, f"duplicate scenario id '{scenario_id}'")
+        seen.add(scenario_id)
+        scenario_at = f"{where} scenario '{scenario_id}'"
+        steps = _parse_steps(raw, scenario_at, problems)
+        scenarios.append(Scenario(
+            id=scenario_id,
+            title=_field(raw, "title", str, at, problems, required=False) or "",
+            steps=steps,
+            variants=_parse_variants(raw.get("steps"), steps, scenario_at, problems),
+        ))
+
+    version = _field(data, "version", (str, int, float), where, problems, required=False)
+    module = Module(
+        id=_field(data, "id", str, where, problems),
+        title=_field(data, "title", str, where, problems, required=False) or "",
+        description=_field(data, "description", str, where, problems, required=False),
+        estimated_minutes=_field(data, "estimated_minutes", (int, float), where, problems, required=False),
+        version=str(version) if version is not None else None,
+        tags=_strings(data, "tags", where, problems, required=False),
+        scenarios=tuple(scenarios),
+    )
+    problems.raise_if_any()
+    return module
+
+
+# ============================================================
+# Quizzes
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class QuizAnswer:
+    text: str
+    style: str
+
+
+@dataclass(frozen=True, slots=True)
+class QuizQuestion:
+    question: str
+    answers: Tuple[QuizAnswer, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Quiz:
+    questions: Tuple[QuizQuestion, ...]
+
+
+def parse_quiz(data: Any, where: str = "quiz") -> Quiz:
+    """
+    Validates raw quiz JSON and compiles it into a Quiz.
+
+    Raises:
+        ContentError: Listing every problem found.
+    """
+    problems = _Problems()
+    if not isinstance(data, dict):
+        problems.add(where, "top level must be an object")
+        problems.raise_if_any()
+
+    questions = []
+    raw_questions = _field(data, "questions", _LIST, where, problems)
+    if raw_questions is not None and not raw_questions:
+        # Scoring needs at least one answer to pick a primary style from.
+        problems.add(where, "needs at least one question")
+    for i, raw in enumerate(raw_questions or ()):
+        at = f"{where} question {i}"
+        if not isinstance(raw, dict):
+            problems.add(at, "question must be an object")
+            continue
+        answers = []
+        raw_answers = _field(raw, "answers", _LIST, at, problems) or ()
+        if not raw_answers:
+            problems.add(at, "needs at least one answer")
+        for j, answer in enumerate(raw_answers):
+            answer_at = (at, "answer", j)
+            if not isinstance(answer, dict):
+                problems.add(answer_at, "answer must be an object")
+                continue
+            answers.append(QuizAnswer(
+                text=_field(answer, "text", str, answer_at, problems),
+                style=_field(answer, "style", str, answer_at, problems),
+            ))
+        questions.append(QuizQuestion(_field(raw, "question", str, at, problems), tuple(answers)))
+
+    problems.raise_if_any()
+    return Quiz(questions=tuple(questions))
+
+
+# ============================================================
+# Lessons
+# ============================================================
+
+@dataclass(frozen=True, slots=True)
+class LessonEntry:
+    """
+    A lesson's table-of-contents entry.
+
+    Steps are either inline (`raw_steps`, validated when the lesson is
+    first opened) or stored in their own file under
+    `content/lessons/<module_id>/` (`file`), loaded only when opened.
+    """
+
+    id: str
+    title: str
+    estimated_minutes: Optional[float]
+    file: Optional[str]
+    raw_steps: Tuple[Any, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class LessonModule:
+    id: str
+    title: str
+    description: Optional[str]
+    lessons: Tuple[LessonEntry, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Lesson:
+    id: str
+    title: str
+    steps: Tuple[Step, ...]
+
+
+def _description(data: Mapping, where: str, problems: _Problems) -> Optional[str]:
+    # Long descriptions may be split into a list of lines.
+    value = _field(data, "description", (str, list, tuple), where, problems, required=False)
+    if isinstance(value, str) or value is None:
+        return value
+    return " ".join(_strings(data, "description", where, problems))
+
+
+def parse_lesson_module(data: Any, where: str = "lessons") -> LessonModule:
+    """
+    Validates a lesson module's outline (not its steps) into a LessonModule.
+
+    Raises:
+        ContentError: Listing every problem found.
+    """
+    problems = _Problems()
+    if not isinstance(data, dict):
+        problems.add(where, "top level must be an object")
+        problems.raise_if_any()
+
+    lessons = []
+    seen = set()
+    for i, raw in enumerate(_field(data, "lessons", _LIST, where, problems, required=False) or ()):
+        at = f"{where} lesson {i}"
+        if not isinstance(raw, dict):
+            problems.add(at, "lesson must be an object")
+            continue
+        lesson_id = _field(raw, "id", str, at, problems)
+        if lesson_id in seen:
+            problems.add(at, f"duplicate lesson id '{lesson_id}'")
+        seen.add(lesson_id)
+
+        file = _field(raw, "file", str, at, problems, required=False)
+        if file is not None and (file != os.path.basename(file) or not file.endswith(".json")):
+            problems.add(at, f"'file' must be a .json file name, got '{file}'")
+        if (file is None) == ("steps" not in raw):
+            problems.add(at, "needs either 'steps' or 'file'")
+
+        lessons.append(LessonEntry(
+            id=lesson_id,
+            title=_field(raw, "title", str, at, problems, required=False) or "",
+            estimated_minutes=_field(raw, "estimated_minutes", (int, float), at, problems, required=False),
+            file=file,
+            raw_steps=tuple(_field(raw, "steps", _LIST, at, problems, required=False) or ()),
+        ))
+
+    module = LessonModule(
+        id=_field(data, "id", str, where, problems),
+        title=_field(data, "title", str, where, problems, required=False) or "",
+        description=_description(data, where, problems),
+        lessons=tuple(lessons),
+    )
+    problems.raise_if_any()
+    return module
+
+
+def parse_lesson(data: Any, where: str = "lesson") -> Lesson:
+    """
+    Validates one lesson (its id, title and steps) into a Lesson.
+
+    Raises:
+        ContentError: Listing every problem found.
+    """
+    problems = _Problems()
+    if not isinstance(data, dict):
+        problems.add(where, "top level must be an object")
+        problems.raise_if_any()
+
+    lesson = Lesson(
+        id=_field(data, "id", str, where, problems),
+        title=_field(data, "title", str, where, problems, required=False) or "",
+        steps=_parse_steps(data, where, problems),
+    )
+    problems.raise_if_any()
+    return lesson
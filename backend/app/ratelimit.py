@@ -0,0 +1,161 @@
+"""
+Per-client, per-route token-bucket rate limiting.
+
+Each (client, route template) pair gets a bucket holding up to `burst`
+tokens, refilled at `rate` tokens per second; a request spends one token
+or is rejected with 429 and a Retry-After header. Limiting per route
+keeps a client stuck retrying one endpoint from starving its other
+requests, and shields workers from retry storms.
+
+Applied as a router dependency (see app/main.py), so the matched route
+template is known and label cardinality stays bounded. Decisions are
+counted in `rate_limit_decisions_total`.
+
+Limiting is opt-in. Clients are identified by address, so behind a
+reverse proxy (without RATE_LIMIT_TRUST_PROXY) or with a crew on one
+restaurant NAT, many trainees share a bucket: size the burst for the
+largest group behind one address (e.g. a whole shift opening the same
+scenario at once), not for a single device.
+
+Configure with environment variables:
+- RATE_LIMIT: "on" enables limiting (default off).
+- RATE_LIMIT_RATE: tokens per second per bucket (default 20).
+- RATE_LIMIT_BURST: bucket size (default 60).
+- RATE_LIMIT_TRUST_PROXY: identify clients by the first X-Forwarded-For
+  address (only behind a trusted proxy).
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.metrics import RATE_LIMIT_DECISIONS
+
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 60
+
+# Buckets kept in memory; the least recently used (idle, hence full) are
+# dropped first.
+MAX_BUCKETS = 10_000
+
+_ENABLED = ("1", "on", "true", "yes")
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by (client, route).
+
+    Buckets are stored as [tokens, last refill time] and refilled lazily
+    on use, so idle clients cost nothing.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str, route: str) -> float:
+        """
+        Spends a token for (client, route).
+
+        Returns 0 if the request is allowed, otherwise the seconds until a
+        token is available.
+        """
+        key = (client, route)
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > MAX_BUCKETS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def create_rate_limiter() -> Optional[TokenBucketLimiter]:
+    """Builds the limiter from environment configuration (None if disabled)."""
+    if os.environ.get("RATE_LIMIT", "off").lower() not in _ENABLED:
+        return None
+    return TokenBucketLimiter(
+        rate=float(os.environ.get("RATE_LIMIT_RATE", DEFAULT_RATE)),
+        burst=int(os.environ.get("RATE_LIMIT_BURST", DEFAULT_BURST)),
+    )
+
+
+_limiter: Optional[TokenBucketLimiter] = None
+_configured = False
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[TokenBucketLimiter]:
+    """Returns the process-wide limiter, creating it on first use."""
+    global _limiter, _configured
+    if not _configured:
+        with _limiter_lock:
+            if not _configured:
+                _limiter = create_rate_limiter()
+                _configured = True
+    return _limiter
+
+
+def set_rate_limiter(limiter: Optional[TokenBucketLimiter]) -> None:
+    """Replaces the process-wide limiter (None disables limiting)."""
+    global _limiter, _configured
+    with _limiter_lock:
+        _limiter = limiter
+        _configured = True
+
+
+def _client_id(request: Request) -> str:
+    if os.environ.get("RATE_LIMIT_TRUST_PROXY"):
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def rate_limit(request: Request) -> None:
+    """
+    Router dependency enforcing the limiter.
+
+    Raises:
+        HTTPException: 429 with Retry-After when the bucket is empty.
+    """
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return
+
+    route = getattr(request.scope.get("route"), "path", None) or request.url.path
+    wait = limiter.acquire(_client_id(request), route)
+    if not wait:
+        RATE_LIMIT_DECISIONS.inc(route, "allowed")
+        return
+
+    RATE_LIMIT_DECISIONS.inc(route, "limited")
+    raise HTTPException(
+        status_code=429,
+        detail="Too many requests",
+        headers={"Retry-After": str(math.ceil(wait))},
+    )
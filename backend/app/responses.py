@@ -0,0 +1,357 @@
+"""
+Pre-serialized JSON responses.
+
+Content payloads only change when the underlying content files change,
+so routers render each payload to JSON bytes once and reuse those bytes
+for every request. Each rendered payload carries a strong ETag (a hash of
+its bytes) so clients can revalidate with `If-None-Match` and receive a
+bodiless 304 when nothing has changed.
+
+Compressed variants (gzip, plus brotli / zstd when those packages are
+installed) are also built once per payload, and `payload_response()`
+picks one from the request's `Accept-Encoding`. Clients can opt into
+MessagePack (when `msgpack` is installed) with `Accept: application/msgpack`.
+Everything else is compressed per request by the GZip middleware in
+main.py, which leaves already-encoded responses untouched.
+
+Streaming endpoints use `ndjson_line()` / `sse_event()` to frame
+individual JSON documents with the same compact encoding.
+"""
+
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
+import importlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.metrics import RENDER_LATENCY
+
+# Clients may keep a copy but must revalidate it (cheap with a 304).
+CACHE_CONTROL = "no-cache"
+
+# Default number of rendered payloads kept per cache.
+DEFAULT_MAX_PAYLOADS = 512
+
+# Bodies smaller than this are not worth compressing. Also used as the
+# GZip middleware threshold so both paths agree.
+MIN_COMPRESS_SIZE = 500
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Content negotiation varies on both headers.
+VARY = "Accept, Accept-Encoding"
+
+# Compression levels. Payloads are compressed on the event loop on cache
+# misses, and some cache keys are client-controlled (catalog queries), so
+# moderate levels are used: most of the size win at a fraction of the
+# cost of the maximum levels (zstd 19, brotli 11).
+ZSTD_LEVEL = 6
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+@functools.lru_cache(maxsize=None)
+def _optional(module: str):
+    """
+    Imports an optional codec package on first use (None if not installed),
+    keeping it out of application startup.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError:  # pragma: no cover - depends on the environment
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Available content-codings, in server preference order."""
+    codecs: Dict[str, Callable[[bytes], bytes]] = {}
+    zstandard = _optional("zstandard")
+    if zstandard is not None:
+        codecs["zstd"] = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+    brotli = _optional("brotli")
+    if brotli is not None:
+        codecs["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output deterministic across workers.
+    codecs["gzip"] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return codecs
+
+
+@dataclass(frozen=True)
+class Representation:
+    """
+    One media type of a payload: its body, ETag and compressed variants.
+
+    `encodings` maps a content-coding (e.g. "gzip") to the compressed body.
+    Codings that do not make the body smaller are left out.
+    """
+
+    media_type: str
+    body: bytes
+    etag: str
+    encodings: Mapping[str, bytes] = field(default_factory=dict)
+
+    def variant(self, coding: Optional[str]) -> Tuple[bytes, str]:
+        """Returns (body, etag) for a content-coding (None = identity)."""
+        if coding is None:
+            return self.body, self.etag
+        # Each encoded variant is a distinct byte sequence, so it gets a
+        # distinct strong ETag.
+        return self.encodings[coding], self.etag[:-1] + "-" + coding + '"'
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _represent(media_type: str, body: bytes, compress: bool = True) -> Representation:
+    encodings: Dict[str, bytes] = {}
+    if compress and len(body) >= MIN_COMPRESS_SIZE:
+        started = time.perf_counter()
+        for coding, compressor in compressors().items():
+            compressed = compressor(body)
+            if len(compressed) < len(body):
+                encodings[coding] = compressed
+        RENDER_LATENCY.observe(time.perf_counter() - started, "compress")
+    return Representation(media_type, body, _etag(body), encodings)
+
+
+@dataclass(frozen=True)
+class RenderedPayload:
+    """
+    A payload serialized once, plus its strong ETag.
+
+    `body` / `etag` are the uncompressed JSON representation; `msgpack` is
+    set when the msgpack package is available.
+    """
+
+    json: Representation
+    msgpack: Optional[Representation] = None
+
+    @property
+    def body(self) -> bytes:
+        return self.json.body
+
+    @property
+    def etag(self) -> str:
+        return self.json.etag
+
+
+def dump_json(data: Any) -> bytes:
+    """
+    Serializes data to compact UTF-8 JSON.
+
+    Output matches FastAPI's default JSONResponse encoding.
+    """
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def render_payload(data: Any) -> RenderedPayload:
+    """
+    Serializes data to compact UTF-8 JSON (and MessagePack, if available),
+    computes ETags and precompresses each representation.
+    """
+    started = time.perf_counter()
+    body = dump_json(data)
+    msgpack = _optional("msgpack")
+    packed_body = msgpack.packb(data, use_bin_type=True) if msgpack is not None else None
+    RENDER_LATENCY.observe(time.perf_counter() - started, "serialize")
+
+    packed = _represent(MSGPACK_MEDIA_TYPE, packed_body) if packed_body is not None else None
+    return RenderedPayload(json=_represent(JSON_MEDIA_TYPE, body), msgpack=packed)
+
+
+def render_serialized(body: bytes, compress: bool = True) -> RenderedPayload:
+    """
+    Wraps JSON bytes that are already serialized: computes the ETag and
+    precompresses, without re-encoding. No MessagePack representation is
+    offered, since the source data is not at hand.
+
+    Pass `compress=False` for fragments that are only spliced into other
+    payloads and never served on their own.
+    """
+    return RenderedPayload(json=_represent(JSON_MEDIA_TYPE, body, compress))
+
+
+class PayloadCache:
+    """
+    Bounded cache of rendered payloads keyed by an arbitrary hashable key.
+
+    Each entry remembers the content object it was rendered from. Content
+    objects come from the shared registry and are replaced (not mutated)
+    when a file changes, so an identity check is enough to detect stale
+    payloads.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_PAYLOADS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[Any, RenderedPayload]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        source: Any,
+        build: Callable[[], Any],
+    ) -> RenderedPayload:
+        """
+        Returns the rendered payload for key, building it if missing or stale.
+
+        Args:
+            key: Cache key (e.g. a (module_id, scenario_id) tuple).
+            source: The content object the payload is derived from.
+            build: Returns the data to serialize; only called on a miss.
+        """
+        return self._get(key, source, lambda: render_payload(build()))
+
+    def get_serialized(
+        self,
+        key: Hashable,
+        source: Any,
+        build: Callable[[], bytes],
+        compress: bool = True,
+    ) -> RenderedPayload:
+        """
+        Like `get()`, but `build` returns JSON bytes that are already
+        serialized (e.g. spliced together from other cached payloads).
+        See `render_serialized()` for `compress`.
+        """
+        return self._get(key, source, lambda: render_serialized(build(), compress))
+
+    def _get(self, key: Hashable, source: Any, render: Callable[[], RenderedPayload]) -> RenderedPayload:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is source:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        payload = render()
+        with self._lock:
+            self._entries[key] = (source, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Checks an If-None-Match header value against a strong ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    # Weak comparison, as required for If-None-Match (RFC 9110 13.1.2).
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """Parses an Accept / Accept-Encoding header into {token: q}."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def _choose_representation(request: Request, payload: RenderedPayload) -> Representation:
+    """MessagePack only when explicitly requested; JSON otherwise."""
+    if payload.msgpack is None:
+        return payload.json
+    accept = _accepted(request.headers.get("accept", ""))
+    json_q = accept.get(JSON_MEDIA_TYPE, 0.0)
+    msgpack_q = max(accept.get(alias, 0.0) for alias in _MSGPACK_ALIASES)
+    return payload.msgpack if msgpack_q > json_q else payload.json
+
+
+def _choose_coding(request: Request, representation: Representation) -> Optional[str]:
+    """Picks the first precomputed coding (server preference) the client accepts."""
+    if not representation.encodings:
+        return None
+    accepted = _accepted(request.headers.get("accept-encoding", ""))
+    wildcard = accepted.get("*", 0.0)
+    for coding in representation.encodings:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def payload_response(request: Request, payload: RenderedPayload) -> Response:
+    """
+    Serves a rendered payload, or a 304 if the client already has it.
+
+    The representation (JSON / MessagePack) and content-coding are chosen
+    from the request headers; no serialization or compression happens here.
+    """
+    representation = _choose_representation(request, payload)
+    coding = _choose_coding(request, representation)
+    body, etag = representation.variant(coding)
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body,
+        media_type=representation.media_type,
+        headers=headers,
+    )
+
+
+# ============================================================
+# Streaming framing
+# ============================================================
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def ndjson_line(data: Any) -> bytes:
+    """Frames one JSON document as a newline-delimited JSON line."""
+    return dump_json(data) + b"\n"
+
+
+def sse_event(event: str, data: Any, event_id: str | None = None) -> bytes:
+    """
+    Frames one JSON document as a Server-Sent Event.
+
+    Compact JSON never contains raw newlines, so a single `data:` line is
+    always sufficient.
+    """
+    head = f"event: {event}\n"
+    if event_id is not None:
+        head += f"id: {event_id}\n"
+    return head.encode("utf-8") + b"data: " + dump_json(data) + b"\n\n"
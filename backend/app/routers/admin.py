@@ -0,0 +1,53 @@
+"""
+Admin API router.
+
+- `POST /admin/content/reload`: validates content and hot-reloads it in
+  every worker (see app/loaders/reload.py).
+- `GET /admin/content/generation`: the content generation this worker
+  serves, to confirm workers have converged after a reload.
+
+Only available when ADMIN_TOKEN is set; requests must send it in the
+`X-Admin-Token` header.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.loaders.reload import reloader
+from app.loaders.snapshot import SnapshotError
+
+
+def _require_admin(x_admin_token: str | None = Header(None)) -> None:
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(_require_admin)])
+
+
+@router.post("/content/reload")
+def reload_content():
+    """
+    Publishes the content on disk as a new generation.
+
+    This worker swaps immediately; the others pick the generation up on
+    their next poll. Invalid content is rejected with every problem listed
+    and the current generation stays live.
+    """
+    try:
+        return reloader.reload()
+    except SnapshotError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/content/generation")
+def content_generation():
+    """Returns the content generation served by this worker."""
+    return {"generation": reloader.generation}
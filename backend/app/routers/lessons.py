@@ -0,0 +1,166 @@
+"""
+Lessons API router.
+
+Long-form lessons (Phase 2), served one lesson and one step at a time:
+- `GET /lessons`: lesson modules in `content/lessons`
+- `GET /lessons/{module_id}`: a module's table of contents
+- `GET /lessons/{module_id}/{lesson_id}`: one lesson's metadata
+- `GET /lessons/{module_id}/{lesson_id}/steps/{index}`: one processed step
+
+Opening a lesson loads and compiles only that lesson (see
+app/engines/lesson_engine.py); the table of contents comes from the
+outline index and never touches lesson steps.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.engines.lesson_engine import CompiledLesson, LessonIndex, aload_lesson, aload_lesson_index
+from app.engines.module_engine import render_step
+from app.loaders.lesson_loader import LESSON_DIR
+from app.models.content import ContentError
+from app.responses import PayloadCache, payload_response
+from app.stores.progress_store import get_progress_store
+
+
+router = APIRouter(prefix="/lessons", tags=["lessons"])
+
+# Rendered table-of-contents payloads, rebuilt when the outline changes.
+_payloads = PayloadCache()
+
+
+# ============================================================
+# Helpers (keep tiny)
+# ============================================================
+
+def _http404(detail: str) -> HTTPException:
+    """Creates a standardized 404 HTTP exception."""
+    return HTTPException(status_code=404, detail=detail)
+
+
+async def _load_index_or_404(module_id: str) -> LessonIndex:
+    try:
+        return await aload_lesson_index(module_id)
+    except FileNotFoundError:
+        raise _http404("Lesson module not found")
+    except ContentError as exc:
+        raise HTTPException(status_code=500, detail=exc.problems)
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+async def _load_lesson_or_404(module_id: str, lesson_id: str) -> tuple[LessonIndex, CompiledLesson]:
+    index = await _load_index_or_404(module_id)
+    try:
+        return index, await aload_lesson(index, module_id, lesson_id)
+    except (KeyError, FileNotFoundError):
+        raise _http404("Lesson not found")
+    except ContentError as exc:
+        raise HTTPException(status_code=500, detail=exc.problems)
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+# ============================================================
+# Routes
+# ============================================================
+
+@router.get("")
+async def list_lesson_modules():
+    """
+    Returns the id, title and lesson count of every lesson module.
+    """
+    module_ids = await run_in_threadpool(lambda: sorted(p.stem for p in LESSON_DIR.glob("*.json")))
+    modules = []
+    for module_id in module_ids:
+        index = await _load_index_or_404(module_id)
+        modules.append({
+            "id": module_id,
+            "title": index.module.title,
+            "lesson_count": len(index.module.lessons),
+        })
+    return modules
+
+
+@router.get("/{module_id}")
+async def get_lesson_toc(module_id: str, request: Request) -> Response:
+    """
+    Returns a lesson module's table of contents: its metadata and, per
+    lesson, id, title, estimated minutes and position.
+
+    As in `GET /lessons`, the module's `id` is its file name (the routing
+    key), not the `id` field inside the file.
+    """
+    index = await _load_index_or_404(module_id)
+    payload = _payloads.get(("toc", module_id), index, lambda: {"id": module_id, **index.toc})
+    return payload_response(request, payload)  # 304 if the client's ETag matches
+
+
+@router.get("/{module_id}/{lesson_id}")
+async def get_lesson(module_id: str, lesson_id: str):
+    """
+    Returns one lesson's metadata: its step count and the neighbouring
+    lessons, for paging through the module.
+    """
+    index, lesson = await _load_lesson_or_404(module_id, lesson_id)
+    previous, following = index.neighbours(lesson_id)
+    return {
+        "module_id": module_id,
+        "lesson_id": lesson.id,
+        "title": lesson.title,
+        "position": index.positions[lesson_id],
+        "total_steps": len(lesson.steps),
+        "previous_lesson": previous,
+        "next_lesson": following,
+    }
+
+
+@router.get("/{module_id}/{lesson_id}/steps/{index}")
+async def get_lesson_step(
+    module_id: str,
+    lesson_id: str,
+    index: int,
+    session_id: str | None = None,
+    primary_style: str | None = None,
+    strategist: int | None = None,
+    guide: int | None = None,
+    anchor: int | None = None,
+    spark: int | None = None,
+):
+    """
+    Returns a single processed lesson step.
+
+    Quiz results for quiz_result steps come from query parameters, or from
+    the session given by `session_id`, as for scenario steps.
+    """
+    _, lesson = await _load_lesson_or_404(module_id, lesson_id)
+
+    params = {
+        "primary_style": primary_style,
+        "strategist": strategist,
+        "guide": guide,
+        "anchor": anchor,
+        "spark": spark,
+    }
+
+    if session_id is not None:
+        # Store backends may block (SQLite), so keep them off the event loop.
+        session = await run_in_threadpool(get_progress_store().get, session_id)
+        if session is None:
+            raise _http404("Session not found")
+        params = session.quiz_result_params()
+
+    try:
+        processed = render_step(lesson.steps, index, **params)
+    except IndexError:
+        raise _http404("Step index out of range")
+
+    return {
+        "module_id": module_id,
+        "lesson_id": lesson_id,
+        "step_index": index,
+        "total_steps": len(lesson.steps),
+        "step": processed,
+    }
@@ -0,0 +1,98 @@
+"""
+Metrics API router.
+
+- `GET /metrics`: Prometheus text exposition of this worker's metrics
+  (see app/metrics.py), plus content registry cache counters.
+- `/metrics/profiler/*`: start/stop an in-process sampling profiler and
+  read its collapsed stacks. Only available when ENABLE_PROFILER is set,
+  since sampling adds overhead and exposes code paths.
+
+Metrics are per process: with several uvicorn workers, each scrape hits
+one worker, so scrape workers individually or aggregate by instance.
+"""
+
+from __future__ import annotations
+
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.loaders.content_registry import registry
+from app.metrics import SamplingProfiler, metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_profiler: SamplingProfiler | None = None
+
+
+def _registry_stats():
+    stats = registry.stats()
+    yield "content_cache_entries", "gauge", "Parsed content files currently cached.", stats["entries"]
+    yield "content_cache_hits_total", "counter", "Content registry cache hits.", stats["hits"]
+    yield "content_cache_misses_total", "counter", "Content registry cache misses (file parsed).", stats["misses"]
+    yield "content_cache_reloads_total", "counter", "Cached files re-read after changing on disk.", stats["reloads"]
+    yield "content_cache_evictions_total", "counter", "Cached files evicted (LRU).", stats["evictions"]
+    yield "content_cache_coalesced_total", "counter", "Async loads that joined an in-flight read.", stats["coalesced"]
+    yield "content_snapshot_hits_total", "counter", "Misses served from the content snapshot.", stats["snapshot_hits"]
+
+
+metrics.add_collector(_registry_stats)
+
+
+def _profiler_enabled() -> bool:
+    return os.environ.get("ENABLE_PROFILER", "").lower() in ("1", "true", "yes", "on")
+
+
+def _require_profiler() -> None:
+    if not _profiler_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Returns all metrics in Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+@router.post("/profiler/start")
+def start_profiler(interval: float = Query(0.005, ge=0.001, le=1.0)):
+    """
+    Starts sampling all thread stacks every `interval` seconds.
+
+    Restarting discards the previous samples.
+    """
+    global _profiler
+    _require_profiler()
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = SamplingProfiler(interval=interval)
+    _profiler.start()
+    return {"running": True, "interval": interval}
+
+
+@router.post("/profiler/stop")
+def stop_profiler():
+    """
+    Stops sampling; collected stacks stay available until the next start.
+    """
+    _require_profiler()
+    if _profiler is not None:
+        _profiler.stop()
+    return {"running": False, "samples": _profiler.samples if _profiler else 0}
+
+
+@router.get("/profiler", response_class=PlainTextResponse)
+def get_profile(limit: int | None = Query(None, ge=1)):
+    """
+    Returns sampled stacks in collapsed format (`frame;frame;... count`),
+    most frequent first, ready for flame graph tools.
+    """
+    _require_profiler()
+    if _profiler is None:
+        return PlainTextResponse("")
+    return PlainTextResponse(_profiler.collapsed(limit))
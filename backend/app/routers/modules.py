@@ -9,18 +9,48 @@ including:
 
 This file intentionally remains a thin routing layer. All file I/O and
 lesson processing logic is delegated to loaders and engines.
+
+Content routes are `async def` and use the async loaders, so a slow
+content directory never ties up Starlette's threadpool.
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
-
-from app.loaders.module_loader import load_module_json
-# from app.engines.module_engine import load_module, get_step, process_step
+import asyncio
+import hashlib
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app.loaders.catalog import CATALOG_FIELDS, InvalidCursor, module_catalog, query_catalog
+from app.loaders.module_loader import ModuleIndex, aload_module_index, aload_module_json
+from app.responses import (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    PayloadCache,
+    RenderedPayload,
+    dump_json,
+    ndjson_line,
+    payload_response,
+    render_serialized,
+    sse_event,
+)
+from app.engines.module_engine import CompiledSteps, aload_compiled_module, personalize_scenario, render_step
+from app.models.content import STYLES, ContentError
+from app.stores.progress_store import get_progress_store
+# from app.engines.module_engine import load_module
 
 
 router = APIRouter(prefix="/modules", tags=["modules"])
 
+# Rendered JSON bytes for catalog and scenario payloads. Entries are
+# rebuilt automatically when the underlying content object changes.
+_payloads = PayloadCache()
+
 
 # ============================================================
 # Helpers (keep tiny)
@@ -36,16 +66,89 @@ def _http404(detail: str) -> HTTPException:
     return HTTPException(status_code=404, detail=detail)
 
 
-def _load_raw_module_or_404(module_id: str) -> dict:
+async def _load_raw_module_or_404(module_id: str) -> dict:
     """
     Loads raw module JSON from disk or raises a 404 if not found.
     """
     try:
-        return load_module_json(module_id)
+        return await aload_module_json(module_id)
+    except FileNotFoundError:
+        raise _http404("Module not found")
+
+
+async def _load_module_index_or_404(module_id: str) -> ModuleIndex:
+    """
+    Loads the scenario index for a module or raises a 404 if not found.
+    """
+    try:
+        return await aload_module_index(module_id)
     except FileNotFoundError:
         raise _http404("Module not found")
 
 
+async def _load_compiled_scenario_or_404(module_id: str, scenario_id: str) -> CompiledSteps:
+    """
+    Loads a scenario's precompiled steps or raises a 404 (500 if the
+    module cannot be compiled).
+    """
+    try:
+        compiled = await aload_compiled_module(module_id)
+    except FileNotFoundError:
+        raise _http404("Module not found")
+    except ContentError as exc:
+        raise HTTPException(status_code=500, detail=exc.problems)
+    except ValueError as exc:
+        # e.g. a step type without a registered handler
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    scenario = compiled.get(scenario_id)
+    if scenario is None:
+        raise _http404("Scenario not found")
+    return scenario
+
+
+def _check_style(style: str | None) -> None:
+    """Rejects unknown quiz styles with a 422."""
+    if style is not None and style not in STYLES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown style: {style}. Allowed: {', '.join(STYLES)}",
+        )
+
+
+def _scenario_payload(module_id: str, scenario_id: str, index: ModuleIndex, style: str | None = None) -> RenderedPayload:
+    """
+    Returns the rendered scenario payload (shared by the single-scenario
+    and bulk endpoints). The scenario must exist in `index`.
+
+    With a style, the scenario is personalized (its step variants for that
+    style applied) and cached per (module, scenario, style), so it costs
+    the same to serve as the unpersonalized payload.
+    """
+    module = index.module
+    if style is None:
+        return _payloads.get(
+            ("scenario", module_id, scenario_id),
+            index,
+            lambda: {
+                "module_id": module.get("module_id", module_id),
+                "title": module.get("title", ""),
+                "scenario": index.scenarios[scenario_id],
+            },
+        )
+
+    return _payloads.get(
+        ("scenario", module_id, scenario_id, style),
+        index,
+        lambda: {
+            "module_id": module.get("module_id", module_id),
+            "title": module.get("title", ""),
+            "style": style,
+            "scenario": personalize_scenario(index.scenarios[scenario_id], style),
+        },
+    )
+
+
 def _load_engine_module_or_404(module_id: str) -> dict:
     """
     Loads a module via the module engine or raises a 404 if not found.
@@ -60,37 +163,262 @@ def _load_engine_module_or_404(module_id: str) -> dict:
 # ============================================================
 # Phase 1: Module catalog for picker UI
 # ============================================================
-# Explicit module catalog used by the Module Picker UI (Phase 1).
-# This is intentionally hardcoded to avoid filesystem scanning and
-# keep behavior deterministic during early development.
-#
-# In later phases, this can be generated dynamically from content/.
-MODULE_CATALOG: list[dict] = [
-    {
-        "id": "orientation",
-        "title": "Orientation",
-        "estimated_minutes": 5,
-        "default_scenario_id": "first_5_minutes",
-    }
-]
+# The catalog is generated from content/modules (see app.loaders.catalog)
+# and refreshed incrementally: only changed module files are re-parsed.
+
+# Fields returned when no `fields=` projection is requested (Phase 1 picker).
+_DEFAULT_CATALOG_FIELDS = ("id", "title", "estimated_minutes", "default_scenario_id")
+
+
+def _catalog_payload(entries, fields: tuple[str, ...]) -> list[dict]:
+    return [{f: m[f] for f in fields} for m in entries]
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    """Validates a comma-separated `fields=` projection."""
+    if fields is None:
+        return _DEFAULT_CATALOG_FIELDS
+
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in CATALOG_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none)'}. "
+                   f"Allowed: {', '.join(CATALOG_FIELDS)}",
+        )
+    return requested
 
 
 @router.get("")
-def list_modules():
+async def list_modules(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=200),
+    cursor: str | None = None,
+    sort: Literal["id", "duration"] = "id",
+    min_minutes: float | None = Query(None, ge=0),
+    max_minutes: float | None = Query(None, ge=0),
+    tag: str | None = None,
+    fields: str | None = None,
+) -> Response:
     """
     Returns module metadata used by the Module Picker UI.
 
-    Only includes fields required by the frontend during Phase 1.
+    Without query parameters, returns the full catalog with the fields
+    required by the frontend during Phase 1. Optional parameters:
+    - limit / cursor: cursor pagination. When more results exist, the
+      next cursor is returned in the `X-Next-Cursor` header and a
+      `Link: <...>; rel="next"` header, so the body stays a plain list.
+    - sort: "id" (default) or "duration".
+    - min_minutes / max_minutes / tag: filters.
+    - fields: comma-separated projection (see CATALOG_FIELDS).
+
+    Queries run against the catalog's presorted index. The unfiltered
+    listing (the Module Picker's request) is serialized once per catalog
+    change; paginated, filtered or projected pages are client-shaped, so
+    they are rendered per request and left out of the shared cache. All
+    responses support ETag revalidation.
+    """
+    await module_catalog.arefresh()
+    index = module_catalog.index
+    projection = _parse_fields(fields)
+
+    try:
+        page, next_cursor = query_catalog(
+            index,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            min_minutes=min_minutes,
+            max_minutes=max_minutes,
+            tag=tag,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    if any(value is not None for value in (limit, cursor, min_minutes, max_minutes, tag, fields)):
+        # Arbitrary queries would otherwise evict scenario payloads.
+        payload = render_serialized(dump_json(_catalog_payload(page, projection)), compress=False)
+    else:
+        payload = _payloads.get(("catalog", sort), index, lambda: _catalog_payload(page, projection))
+    response = payload_response(request, payload)
+
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+    return response
+
+
+# ============================================================
+# Offline sync: bulk scenario fetch and versioned content bundle
+# ============================================================
+# Tablets pre-load a shift's training in one round trip. Responses are
+# assembled from per-scenario / per-module JSON bytes that are rendered
+# once per content version, so a bulk response costs a byte join.
+
+# Upper bound on (module_id, scenario_id) pairs per bulk request.
+MAX_BULK_ITEMS = 100
+
+
+class ScenarioRef(BaseModel):
+    module_id: str
+    scenario_id: str
+    style: str | None = None
+
+
+class BulkScenarioRequest(BaseModel):
+    items: list[ScenarioRef] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BundleDeltaRequest(BaseModel):
+    # module_id -> version the device already has
+    versions: dict[str, str] = {}
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+async def _gather_indexes(module_ids) -> dict:
+    """Loads module indexes concurrently; missing modules map to None."""
+    module_ids = list(dict.fromkeys(module_ids))
+    results = await asyncio.gather(
+        *(aload_module_index(m) for m in module_ids),
+        return_exceptions=True,
+    )
+    indexes = {}
+    for module_id, result in zip(module_ids, results):
+        if isinstance(result, FileNotFoundError):
+            indexes[module_id] = None
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            indexes[module_id] = result
+    return indexes
+
+
+@router.post("/bulk")
+async def get_scenarios_bulk(request: BulkScenarioRequest) -> Response:
+    """
+    Returns many scenarios in one response.
+
+    Items come back in request order. Each is either the same payload as
+    `GET /modules/{module_id}/scenario/{scenario_id}` or, when the module
+    or scenario does not exist, `{"module_id", "scenario_id", "error"}`;
+    one missing item does not fail the whole request. Items may name a
+    quiz `style` to get the personalized scenario.
     """
-    return [
-        {
-            "id": m["id"],
-            "title": m["title"],
-            "estimated_minutes": m["estimated_minutes"],
-            "default_scenario_id": m["default_scenario_id"],
-        }
-        for m in MODULE_CATALOG
-    ]
+    for item in request.items:
+        _check_style(item.style)
+    indexes = await _gather_indexes(item.module_id for item in request.items)
+
+    parts = []
+    for item in request.items:
+        index = indexes[item.module_id]
+        error = None
+        if index is None:
+            error = "Module not found"
+        elif not index.scenarios.get(item.scenario_id):
+            error = "Scenario not found"
+
+        if error is not None:
+            parts.append(dump_json({"module_id": item.module_id, "scenario_id": item.scenario_id, "error": error}))
+        else:
+            parts.append(_scenario_payload(item.module_id, item.scenario_id, index, item.style).body)
+
+    return _json_response(b'{"items":[' + b",".join(parts) + b"]}")
+
+
+def module_version(module: dict) -> str:
+    """
+    A module's sync version: its `version` field, or a content hash for
+    modules that do not declare one.
+    """
+    version = module.get("version")
+    if version is not None:
+        return str(version)
+    return "sha-" + hashlib.blake2b(dump_json(module), digest_size=8).hexdigest()
+
+
+async def _bundle_modules() -> list[tuple[str, str, RenderedPayload]]:
+    """Returns (module_id, version, rendered module) for every catalog module."""
+    entries = await module_catalog.arefresh()
+    indexes = await _gather_indexes(entry["id"] for entry in entries)
+
+    modules = []
+    for module_id, index in indexes.items():
+        if index is None:  # removed since the catalog last refreshed
+            continue
+        module = index.module
+        # Only spliced into bundles, so not precompressed on its own.
+        payload = _payloads.get_serialized(("module", module_id), module, lambda: dump_json(module), compress=False)
+        modules.append((module_id, module_version(module), payload))
+    return modules
+
+
+def _bundle_version(modules) -> str:
+    manifest = dump_json([[module_id, version] for module_id, version, _ in modules])
+    return hashlib.blake2b(manifest, digest_size=16).hexdigest()
+
+
+def _bundle_body(bundle_version: str, modules, removed: list[str], unchanged: list[str]) -> bytes:
+    entries = b",".join(
+        dump_json(module_id) + b':{"version":' + dump_json(version) + b',"module":' + payload.body + b"}"
+        for module_id, version, payload in modules
+    )
+    return (
+        b'{"bundle_version":' + dump_json(bundle_version)
+        + b',"modules":{' + entries + b"}"
+        + b',"removed":' + dump_json(removed)
+        + b',"unchanged":' + dump_json(unchanged)
+        + b"}"
+    )
+
+
+@router.get("/bundle")
+async def get_content_bundle(request: Request) -> Response:
+    """
+    Returns every module's full content with its version.
+
+    The bundle is rendered once per bundle content and served with an
+    ETag, so an up-to-date device gets a 304. Devices holding older
+    content should use `POST /modules/bundle/delta`.
+    """
+    modules = await _bundle_modules()
+    bundle_version = _bundle_version(modules)
+
+    # Keyed by every module's content hash (not just declared versions),
+    # so edits without a version bump are picked up too.
+    payload = _payloads.get_serialized(
+        ("bundle", bundle_version, tuple(payload.etag for _, _, payload in modules)),
+        None,
+        lambda: _bundle_body(bundle_version, modules, [], []),
+    )
+    return payload_response(request, payload)
+
+
+@router.post("/bundle/delta")
+async def get_content_bundle_delta(request: BundleDeltaRequest) -> Response:
+    """
+    Returns only the modules that changed since a device's last sync.
+
+    The device sends the versions it holds (`{"versions": {module_id:
+    version}}`). The response contains modules that are new or whose
+    version differs, the ids of modules it should delete (`removed`), the
+    ids it already has current (`unchanged`), and the `bundle_version` to
+    keep for the next sync.
+    """
+    modules = await _bundle_modules()
+    held = request.versions
+
+    changed = [m for m in modules if held.get(m[0]) != m[1]]
+    unchanged = [module_id for module_id, version, _ in modules if held.get(module_id) == version]
+    current = {module_id for module_id, _, _ in modules}
+    removed = sorted(module_id for module_id in held if module_id not in current)
+
+    return _json_response(_bundle_body(_bundle_version(modules), changed, removed, unchanged))
 
 
 # ============================================================
@@ -98,13 +426,13 @@ def list_modules():
 # ============================================================
 
 @router.get("/{module_id}/raw")
-def get_module_raw(module_id: str):
+async def get_module_raw(module_id: str):
     """
     Returns the raw module JSON exactly as it exists on disk.
 
     Intended for debugging and development only.
     """
-    return _load_raw_module_or_404(module_id)
+    return await _load_raw_module_or_404(module_id)
 
 
 # # ============================================================
@@ -131,47 +459,123 @@ def get_module_raw(module_id: str):
 #     }
 
 
-# # ============================================================
-# # Engine: processed step endpoint
-# # ============================================================
+# ============================================================
+# Engine: processed scenario step endpoint
+# ============================================================
 
-# @router.get("/{module_id}/step/{index}")
-# def get_module_step(
-#     module_id: str,
-#     index: int,
-#     primary_style: str | None = None,
-#     strategist: int | None = None,
-#     guide: int | None = None,
-#     anchor: int | None = None,
-#     spark: int | None = None,
-# ):
-#     """
-#     Returns a single processed lesson step using the module engine.
+@router.get("/{module_id}/scenario/{scenario_id}/step/{index}")
+async def get_scenario_step(
+    module_id: str,
+    scenario_id: str,
+    index: int,
+    session_id: str | None = None,
+    primary_style: str | None = None,
+    strategist: int | None = None,
+    guide: int | None = None,
+    anchor: int | None = None,
+    spark: int | None = None,
+):
+    """
+    Returns a single processed scenario step using the module engine.
 
-#     This endpoint supports engine-driven lesson flows and is primarily
-#     used for debugging and future interactive progression models.
-#     """
-#     module = _load_engine_module_or_404(module_id)
+    Lets clients fetch one step at a time instead of a whole scenario.
+    When `session_id` is given, quiz_result steps use the quiz results
+    stored for that session instead of query parameters.
+
+    Steps are precompiled per module version, so this is an index lookup.
+    """
+    compiled = await _load_compiled_scenario_or_404(module_id, scenario_id)
+
+    params = {
+        "primary_style": primary_style,
+        "strategist": strategist,
+        "guide": guide,
+        "anchor": anchor,
+        "spark": spark,
+    }
 
-#     try:
-#         raw_step = get_step(module, index)
-#     except IndexError:
-#         raise _http404("Step index out of range")
+    if session_id is not None:
+        # Store backends may block (SQLite), so keep them off the event loop.
+        session = await run_in_threadpool(get_progress_store().get, session_id)
+        if session is None:
+            raise _http404("Session not found")
+        params = session.quiz_result_params()
 
-#     processed = process_step(
-#         raw_step,
-#         primary_style=primary_style,
-#         strategist=strategist,
-#         guide=guide,
-#         anchor=anchor,
-#         spark=spark,
-#     )
+    try:
+        processed = render_step(compiled, index, **params)
+    except IndexError:
+        raise _http404("Step index out of range")
 
-#     return {
-#         "module_id": module_id,
-#         "step_index": index,
-#         "step": processed,
-#     }
+    return {
+        "module_id": module_id,
+        "scenario_id": scenario_id,
+        "step_index": index,
+        "total_steps": len(compiled),
+        "step": processed,
+    }
+
+
+# ============================================================
+# Streaming: scenario steps as NDJSON / Server-Sent Events
+# ============================================================
+
+@router.get("/{module_id}/scenario/{scenario_id}/stream")
+async def stream_module_scenario(
+    module_id: str,
+    scenario_id: str,
+    request: Request,
+    format: Literal["ndjson", "sse"] | None = None,
+    session_id: str | None = None,
+):
+    """
+    Streams a scenario one processed step at a time.
+
+    The first message carries scenario metadata (including `total_steps`),
+    followed by one message per step and a final `end` message, so clients
+    can render the first step before the rest has arrived.
+
+    Format is NDJSON by default, or Server-Sent Events when `format=sse`
+    or the client sends `Accept: text/event-stream`.
+    """
+    index = await _load_module_index_or_404(module_id)
+    scenario = index.scenarios.get(scenario_id)
+    if not scenario:
+        raise _http404("Scenario not found")
+    compiled = await _load_compiled_scenario_or_404(module_id, scenario_id)
+
+    params = {}
+    if session_id is not None:
+        session = await run_in_threadpool(get_progress_store().get, session_id)
+        if session is None:
+            raise _http404("Session not found")
+        params = session.quiz_result_params()
+
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "sse" if SSE_MEDIA_TYPE in accept else "ndjson"
+
+    meta = {
+        "module_id": index.module.get("module_id", module_id),
+        "title": index.module.get("title", ""),
+        "scenario_id": scenario_id,
+        "scenario_title": scenario.get("title", ""),
+        "total_steps": len(compiled),
+    }
+
+    def frame(kind: str, data: dict, event_id: str | None = None) -> bytes:
+        if format == "sse":
+            return sse_event(kind, data, event_id)
+        return ndjson_line({"type": kind, **data})
+
+    async def stream():
+        yield frame("meta", meta)
+        for i in range(len(compiled)):
+            yield frame("step", {"step_index": i, "step": render_step(compiled, i, **params)}, str(i))
+        yield frame("end", {})
+
+    if format == "sse":
+        return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE, headers={"Cache-Control": "no-cache"})
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
 
 
 # ============================================================
@@ -179,23 +583,26 @@ def get_module_raw(module_id: str):
 # ============================================================
 
 @router.get("/{module_id}/scenario/{scenario_id}")
-def get_module_scenario(module_id: str, scenario_id: str):
+async def get_module_scenario(
+    module_id: str,
+    scenario_id: str,
+    request: Request,
+    style: str | None = None,
+) -> Response:
     """
     Returns a single scenario from a module in a frontend-friendly format.
 
     This is the primary content delivery endpoint used by the Phase 1
-    scenario-based training flow.
-    """
-    module = _load_raw_module_or_404(module_id)
+    scenario-based training flow. The payload is rendered to JSON once per
+    module version and served with a strong ETag (304 on If-None-Match).
 
-    scenarios = module.get("scenarios", [])
-    scenario = next((s for s in scenarios if s.get("id") == scenario_id), None)
+    With `style` (a quiz style, e.g. the learner's primary_style), steps
+    use that style's variants; personalized payloads are cached per style.
+    """
+    _check_style(style)
+    index = await _load_module_index_or_404(module_id)
 
-    if not scenario:
+    if not index.scenarios.get(scenario_id):
         raise _http404("Scenario not found")
 
-    return {
-        "module_id": module.get("module_id", module_id),
-        "title": module.get("title", ""),
-        "scenario": scenario,
-    }
+    return payload_response(request, _scenario_payload(module_id, scenario_id, index, style))
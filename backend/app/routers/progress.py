@@ -0,0 +1,134 @@
+"""
+Session progress API router.
+
+Exposes server-side scenario sessions so clients can fetch only the step
+a trainee is on rather than downloading and replaying whole scenarios:
+- Start a session for a module scenario
+- Read the current step (resume)
+- Advance to the next step
+
+Progress is persisted through the configured progress store. Quiz results
+are attached to a session by passing `session_id` when submitting a quiz.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.engines.module_engine import CompiledSteps, load_compiled_module, render_step
+from app.models.content import ContentError
+from app.stores.progress_store import SessionProgress, get_progress_store
+
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+
+class SessionStart(BaseModel):
+    module_id: str
+    scenario_id: str
+
+
+# ============================================================
+# Helpers (keep tiny)
+# ============================================================
+
+def _http404(detail: str) -> HTTPException:
+    """Creates a standardized 404 HTTP exception."""
+    return HTTPException(status_code=404, detail=detail)
+
+
+def _load_scenario_or_404(module_id: str, scenario_id: str) -> CompiledSteps:
+    try:
+        compiled = load_compiled_module(module_id)
+    except FileNotFoundError:
+        raise _http404("Module not found")
+    except ContentError as exc:
+        raise HTTPException(status_code=500, detail=exc.problems)
+    except ValueError as exc:
+        # e.g. a step type without a registered handler
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    scenario = compiled.get(scenario_id)
+    if scenario is None:
+        raise _http404("Scenario not found")
+    return scenario
+
+
+def _load_session_or_404(session_id: str) -> SessionProgress:
+    session = get_progress_store().get(session_id)
+    if session is None:
+        raise _http404("Session not found")
+    return session
+
+
+def _session_payload(session: SessionProgress) -> dict:
+    """
+    Builds the response for a session: progress plus the current step only.
+
+    `step` is None once the trainee has moved past the last step.
+    """
+    compiled = _load_scenario_or_404(session.module_id, session.scenario_id)
+    completed = session.step_index >= len(compiled)
+
+    step = None
+    if not completed:
+        step = render_step(compiled, session.step_index, **session.quiz_result_params())
+
+    return {
+        "session_id": session.session_id,
+        "module_id": session.module_id,
+        "scenario_id": session.scenario_id,
+        "step_index": session.step_index,
+        "total_steps": len(compiled),
+        "completed": completed,
+        "step": step,
+    }
+
+
+# ============================================================
+# Endpoints
+# ============================================================
+
+@router.post("")
+def start_session(start: SessionStart):
+    """
+    Starts a new session at the first step of a scenario.
+    """
+    # Validate the target before creating anything.
+    _load_scenario_or_404(start.module_id, start.scenario_id)
+
+    session = get_progress_store().create(start.module_id, start.scenario_id)
+    return _session_payload(session)
+
+
+@router.get("/{session_id}")
+def get_session(session_id: str):
+    """
+    Returns the session's progress and the step it is currently on.
+    """
+    return _session_payload(_load_session_or_404(session_id))
+
+
+@router.post("/{session_id}/advance")
+def advance_session(session_id: str):
+    """
+    Moves the session forward one step and returns the new current step.
+    """
+    store = get_progress_store()
+    session = _load_session_or_404(session_id)
+
+    total = len(_load_scenario_or_404(session.module_id, session.scenario_id))
+    if session.step_index < total:
+        session.step_index += 1
+        store.save(session)
+
+    return _session_payload(session)
+
+
+@router.delete("/{session_id}", status_code=204)
+def end_session(session_id: str):
+    """
+    Discards a session and its stored progress.
+    """
+    get_progress_store().delete(session_id)
@@ -1,6 +1,19 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from app.engines.quiz_engine import run_quiz, load_quiz
+import time
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from app.engines.quiz_engine import (
+    InvalidAnswers,
+    aload_compiled_quiz,
+    aload_public_quiz,
+    score_quiz,
+    score_quiz_batch,
+    shuffled_quiz,
+)
+from app.models.content import ContentError
+from app.responses import PayloadCache, dump_json, payload_response, render_serialized
+from app.stores.progress_store import get_progress_store
 
 # Create a router object responsible for all quiz-related endpoints.
 router = APIRouter(
@@ -9,29 +22,98 @@ router = APIRouter(
     tags=["quiz"]
 )
 
+# Sanitized quiz content rendered to JSON bytes once per quiz file version.
+# Seeded (shuffled) variants are not cached: seeds are client-chosen.
+_payloads = PayloadCache()
+
+# Shuffle seeds are limited to 32 bits.
+MAX_SEED = 2**32 - 1
+
+# Upper bound on answer lists per batch request.
+MAX_BATCH_SUBMISSIONS = 1000
+
 ######### HELPER FUNCTIONS #########
 ####################################
 
-def sanitize_quiz(raw_quiz: dict) -> dict:
+def _canonical_quiz_id(quiz_id: str) -> str:
+    """
+    Converts a URL quiz ID (e.g. 'server-style') into the quiz's canonical
+    ID, its filename stem ('server_style'). Both spellings name one quiz.
     """
-    Remove scoring metadata ('style') and return only the text needed for the 
-    front end.
+    return quiz_id.replace('-', '_')
+
+
+def _quiz_filename(quiz_id: str) -> str:
+    """Converts a URL quiz ID (e.g. 'server-style') into its JSON filename."""
+    return f"{_canonical_quiz_id(quiz_id)}.json"
+
+
+def _quiz_not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="Quiz not found")
+
+
+async def _load_quiz_or_404(load, quiz_id: str):
     """
-    # Store a list of dictionaries, each containing a question and its answer texts.
-    safe_questions = []
+    Loads a quiz view with `load` (aload_compiled_quiz or aload_public_quiz),
+    mapping a missing file to 404 and invalid content to 500.
+    """
+    try:
+        return await load(_quiz_filename(quiz_id))
+    except FileNotFoundError:
+        raise _quiz_not_found()
+    except ContentError as exc:
+        raise HTTPException(status_code=500, detail=exc.problems)
+    except ValueError as exc:
+        # e.g. invalid JSON
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _invalid_answers(exc: InvalidAnswers, loc: list) -> HTTPException:
+    """
+    Convert a scoring shape error into a 422 shaped like FastAPI's own
+    request validation errors.
+    """
+    if exc.submission is not None:
+        loc = loc + [exc.submission]
+    if exc.position is not None:
+        loc = loc + [exc.position]
+    return HTTPException(
+        status_code=422,
+        detail=[{"loc": loc, "msg": str(exc), "type": "value_error"}],
+    )
+
+
+def _record_session_result(session_id: str, quiz_id: str, result: dict) -> bool:
+    """Attaches a scored result to a progress session. False if not found."""
+    store = get_progress_store()
+    session = store.get(session_id)
+    if session is None:
+        return False
+    session.record_quiz_result(quiz_id, result)
+    store.save(session)
+    return True
+
+
+def _quiz_analytics():
+    # Imported on first use, keeping the analytics subsystem out of startup.
+    from app.stores.analytics_store import get_quiz_analytics
+    return get_quiz_analytics()
+
+
+def _record_submission(quiz_id: str, submission: "QuizSubmission", quiz, result: dict) -> None:
+    """Queues a scored submission for analytics (never blocks)."""
+    from app.stores.analytics_store import SubmissionRecord
 
-    # Loop through each question and remove the 'style' metadata from its answers.
-    for q in raw_quiz["questions"]:
-        # List comprehension to extract only the text (not the style).
-        safe_answers = [a["text"] for a in q["answers"]]
-        # Append a dictionary containing the question and its answer texts.
-        safe_questions.append({
-            "question": q["question"],
-            "answers": safe_answers
-        })
+    _quiz_analytics().record(SubmissionRecord(
+        quiz_id=quiz_id,
+        answers=tuple(submission.answers),
+        primary_style=result["primary_style"],
+        location=submission.location,
+        submitted_at=time.time(),
+        seed=submission.seed,
+        answer_counts=quiz.answer_counts,
+    ))
 
-    # Return a dictionary containing the sanitized data for the front end.
-    return {"questions": safe_questions}
 
 ####################################
 ####################################
@@ -40,22 +122,118 @@ def sanitize_quiz(raw_quiz: dict) -> dict:
 # and automatically convert the request body into a QuizSubmission instance.
 class QuizSubmission(BaseModel):
     answers: list[int]
+    # Optional: attach the result to a progress session (see routers/progress.py)
+    # so later quiz_result steps can read it instead of query parameters.
+    session_id: str | None = None
+    # Optional: the shuffle seed the quiz content was fetched with, so answer
+    # indices refer to the shuffled order.
+    seed: int | None = Field(None, ge=0, le=MAX_SEED)
+    # Optional: where the trainee works, for per-location stats (locations
+    # not listed in ANALYTICS_LOCATIONS are counted as "other").
+    location: str | None = Field(None, max_length=64)
 
-# Registers an endpoint.
-@router.post("/server-style")
-def submit_quiz(submission: QuizSubmission):
+# A whole cohort (or a replay of historic submissions) scored in one request.
+class QuizBatchSubmission(BaseModel):
+    submissions: list[list[int]] = Field(..., max_length=MAX_BATCH_SUBMISSIONS)
+    seed: int | None = Field(None, ge=0, le=MAX_SEED)
+
+# Registers an endpoint. Any file in content/quizzes/ is addressable by ID,
+# e.g. /quiz/server-style -> server_style.json.
+@router.post("/{quiz_id}")
+async def submit_quiz(quiz_id: str, submission: QuizSubmission):
     """
     FastAPI reads the JSON request body, validates it using QuizSubmission,
     and injects the parsed model instance as 'submission'.
+
+    Answers are then checked against the quiz's precomputed shape; a wrong
+    number of answers or an out-of-range index returns 422.
     """
-    # Loads quiz content, evaluates the user's answers using run_quiz,
-    # and returns the resulting score breakdown + primary style.
-    result = run_quiz("server_style.json", submission.answers)
+    # Loads the compiled quiz (without blocking the event loop), evaluates the
+    # user's answers, and returns the resulting score breakdown + primary style.
+    quiz = await _load_quiz_or_404(aload_compiled_quiz, quiz_id)
+
+    try:
+        if submission.seed is not None:
+            # Answers refer to the shuffled order the content was served in.
+            quiz = shuffled_quiz(quiz, submission.seed)
+        result = score_quiz(quiz, submission.answers)
+    except InvalidAnswers as exc:
+        raise _invalid_answers(exc, ["body", "answers"])
+
+    if submission.session_id is not None:
+        # Store backends may block (SQLite), so keep them off the event loop.
+        found = await run_in_threadpool(_record_session_result, submission.session_id, quiz_id, result)
+        if not found:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+    # Logged and rolled up in the background (see GET /quiz/{quiz_id}/stats),
+    # keyed by the canonical ID so every URL spelling shares one bucket.
+    _record_submission(_canonical_quiz_id(quiz_id), submission, quiz, result)
+
     # FastAPI serializes the Python dictionary to JSON and sends it as the response.
     return result
 
-@router.get("/server-style/content")
-def get_quiz_content():
-    raw = load_quiz("server_style.json")   # Load raw quiz data (including style keys)
-    safe = sanitize_quiz(raw)              # Strip style data before returning
-    return safe                            # FastAPI serializes dictionary into JSON
+@router.get("/{quiz_id}/content")
+async def get_quiz_content(
+    quiz_id: str,
+    request: Request,
+    seed: int | None = Query(None, ge=0, le=MAX_SEED),
+) -> Response:
+    """
+    Returns the quiz's questions and answer texts, without scoring data.
+
+    With `seed`, answers are shuffled per question in an order fixed by the
+    seed; submit the same seed with the answers so they are scored against
+    that order.
+    """
+    filename = _quiz_filename(quiz_id)
+    # Public (text-only) view, kept apart from the scoring table.
+    public = await _load_quiz_or_404(aload_public_quiz, quiz_id)
+    if seed is None:
+        # Serialized once per quiz version; the read path is a byte copy.
+        payload = _payloads.get(filename, public, lambda: public.payload())
+    else:
+        # Any of 2**32 seeds may be requested, so shuffled views are built
+        # per request (a small shuffle and dump, left uncompressed) rather
+        # than churning the shared cache.
+        payload = render_serialized(dump_json(public.payload(seed)), compress=False)
+    return payload_response(request, payload)  # 304 if the client's ETag matches
+
+
+@router.get("/{quiz_id}/stats")
+async def get_quiz_stats(quiz_id: str):
+    """
+    Returns aggregated submissions for a quiz: counts per primary style,
+    answer histograms per question, and style counts per location and per
+    ISO week.
+
+    Read from incrementally maintained rollups, so the cost does not grow
+    with the number of submissions. Submissions from the last second or so
+    may not be included yet.
+    """
+    await _load_quiz_or_404(aload_compiled_quiz, quiz_id)
+
+    # The SQLite backend blocks, so keep it off the event loop.
+    return await run_in_threadpool(_quiz_analytics().stats, _canonical_quiz_id(quiz_id))
+
+
+@router.post("/{quiz_id}/batch")
+async def submit_quiz_batch(quiz_id: str, batch: QuizBatchSubmission):
+    """
+    Scores many submissions for one quiz in a single pass.
+
+    Results are returned in the same order as the submitted answer lists.
+    At most MAX_BATCH_SUBMISSIONS lists are accepted per request.
+    """
+    quiz = await _load_quiz_or_404(aload_compiled_quiz, quiz_id)
+
+    try:
+        if batch.seed is not None:
+            quiz = shuffled_quiz(quiz, batch.seed)
+        # CPU-bound for large batches, so keep it off the event loop.
+        results = await run_in_threadpool(score_quiz_batch, quiz, batch.submissions)
+    except InvalidAnswers as exc:
+        # Bad answer shapes are a client error, not a server failure.
+        raise _invalid_answers(exc, ["body", "submissions"])
+
+    return {"count": len(results), "results": results}
@@ -1,45 +1,105 @@
 from fastapi import APIRouter, HTTPException
-from pathlib import Path
-import json
+from pydantic import BaseModel
+
+from app.engines.scenario_engine import (
+    ScenarioGraph,
+    ScenarioGraphError,
+    aload_scenario_graph,
+    step_payload,
+)
+from app.loaders.module_loader import aload_module_index, aload_module_json
 
 router = APIRouter()
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-MODULES_DIR = BASE_DIR / "content" / "modules"
+
+class ScenarioChoice(BaseModel):
+    option: int
+
+
+async def _load_graph_or_404(scenario_id: str) -> ScenarioGraph:
+    try:
+        return await aload_scenario_graph(scenario_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    except ScenarioGraphError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _step_index_or_404(graph: ScenarioGraph, step_id: str) -> int:
+    index = graph.index.get(step_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Step not found")
+    return index
 
 
 @router.get("/scenarios/{scenario_id}")
-def get_scenario(scenario_id: str):
+async def get_scenario(scenario_id: str):
     """
     Direct scenario loader (by scenario id).
-    """
-    scenario_file = MODULES_DIR / f"{scenario_id}.json"
 
-    if not scenario_file.exists():
+    Served from the shared content registry; file I/O stays off the event loop.
+    """
+    try:
+        return await aload_module_json(scenario_id)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Scenario not found")
 
-    with open(scenario_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
 
 @router.get("/modules/{module_id}/scenario")
-def get_module_default_scenario(module_id: str):
+async def get_module_default_scenario(module_id: str):
     """
     Load the default scenario for a module.
-    """
-    module_file = MODULES_DIR / f"{module_id}.json"
 
-    if not module_file.exists():
+    Uses the cached module index, so the default scenario is precomputed
+    rather than re-read from disk.
+    """
+    try:
+        index = await aload_module_index(module_id)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Module not found")
 
-    with open(module_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    scenarios = data.get("scenarios", [])
-    if not scenarios:
+    if index.default_scenario is None:
         raise HTTPException(status_code=404, detail="Scenario not found")
 
     return {
-        "module_id": data["id"],
-        "scenario": scenarios[0]
+        "module_id": index.module["id"],
+        "scenario": index.default_scenario
     }
+
+
+@router.get("/scenarios/{scenario_id}/start")
+async def start_branching_scenario(scenario_id: str):
+    """
+    Returns the first step of a branching scenario.
+
+    Only the current step is sent; option targets stay on the server.
+    """
+    graph = await _load_graph_or_404(scenario_id)
+    return step_payload(graph, graph.start)
+
+
+@router.get("/scenarios/{scenario_id}/steps/{step_id}")
+async def get_branching_step(scenario_id: str, step_id: str):
+    """
+    Returns one step of a branching scenario (e.g. to resume).
+    """
+    graph = await _load_graph_or_404(scenario_id)
+    return step_payload(graph, _step_index_or_404(graph, step_id))
+
+
+@router.post("/scenarios/{scenario_id}/steps/{step_id}/advance")
+async def advance_branching_scenario(scenario_id: str, step_id: str, choice: ScenarioChoice):
+    """
+    Follows the chosen option from a step and returns the step it leads to.
+
+    Uses the compiled graph, so each move is a constant-time lookup.
+    """
+    graph = await _load_graph_or_404(scenario_id)
+    current = _step_index_or_404(graph, step_id)
+
+    try:
+        target = graph.advance(current, choice.option)
+    except IndexError:
+        raise HTTPException(status_code=422, detail="Option not available on this step")
+
+    return step_payload(graph, target)
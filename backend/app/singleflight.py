@@ -0,0 +1,112 @@
+"""
+Request coalescing ("singleflight").
+
+When several callers ask for the same thing at the same moment (e.g. a
+whole crew opening the same scenario at shift start), only the first one
+computes it; the others wait for, and share, that result or exception.
+Nothing is cached: once the computation finishes the key is released, and
+caching stays the job of the content registry and payload caches.
+
+- `SingleFlight`: for code running in threads (sync routes, threadpool).
+- `AsyncSingleFlight`: for coroutines on one event loop.
+
+Every call is counted per group in `singleflight_calls_total`, split into
+`leader` (computed) and `shared` (joined an in-flight computation).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.metrics import SINGLEFLIGHT_CALLS
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads."""
+
+    def __init__(self, group: str):
+        self.group = group
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Returns `fn()`, or the result of an identical call in progress."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            SINGLEFLIGHT_CALLS.inc(self.group, "shared")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_CALLS.inc(self.group, "leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent awaits with the same key on an event loop.
+
+    The computation runs in its own task, which no caller owns: every caller
+    (the first included) awaits it through `asyncio.shield`, so cancelling
+    any one of them, such as a disconnected client, neither cancels the work
+    nor fails the others.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self.shared = 0
+        # Also keeps running tasks referenced until they finish.
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns `await fn()`, or the result of an identical call in progress."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            SINGLEFLIGHT_CALLS.inc(self.group, "shared")
+        else:
+            SINGLEFLIGHT_CALLS.inc(self.group, "leader")
+            task = asyncio.get_running_loop().create_task(self._run(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _run(fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await fn()
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody awaited does not log a warning.
+            task.exception()
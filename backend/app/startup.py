@@ -0,0 +1,134 @@
+"""
+Startup instrumentation, background warm-up and readiness.
+
+- `phase(name)` times a startup phase (import, validate, snapshot, ...);
+  durations are exported as `startup_phase_seconds{phase}` and reported by
+  `GET /health/ready`.
+- `warm_up()` runs as a background task once the app is accepting
+  traffic: it refreshes the module catalog and pre-parses and compiles
+  popular modules, quizzes and lesson outlines, yielding to requests
+  between files. Requests that arrive first simply load on demand.
+- `state.ready` turns true when startup has finished and the warm-up has
+  completed (or is disabled); liveness does not wait for it.
+
+Configure with:
+- CONTENT_WARMUP: "off" disables the warm-up (the worker is ready as
+  soon as startup completes).
+- WARMUP_MODULES: comma-separated module ids to warm; defaults to the
+  first WARMUP_LIMIT (20) modules of the catalog.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.loaders.content_registry import CONTENT_DIR
+from app.metrics import STARTUP_SECONDS
+
+DEFAULT_WARMUP_LIMIT = 20
+
+QUIZ_DIR = CONTENT_DIR / "quizzes"
+
+_DISABLED = ("0", "off", "false", "no")
+
+
+class StartupState:
+    """Startup phase timings and warm-up progress for this worker."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.warming = False
+        self.ready = False
+        self.warmed = 0
+        self.failed: List[str] = []
+
+    def mark_ready(self) -> None:
+        self.ready = True
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+        STARTUP_SECONDS.set(seconds, name)
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warming_up": self.warming,
+            "startup_seconds": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "warmed": self.warmed,
+            "warmup_failures": list(self.failed),
+        }
+
+
+# Process-wide startup state.
+state = StartupState()
+
+
+@contextmanager
+def phase(name: str):
+    """Times a block as startup phase `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.record(name, time.perf_counter() - started)
+
+
+def warmup_enabled() -> bool:
+    return os.environ.get("CONTENT_WARMUP", "on").lower() not in _DISABLED
+
+
+def _warmup_module_ids(catalog_ids: List[str]) -> List[str]:
+    configured = os.environ.get("WARMUP_MODULES")
+    if configured:
+        return [module_id.strip() for module_id in configured.split(",") if module_id.strip()]
+    limit = int(os.environ.get("WARMUP_LIMIT", DEFAULT_WARMUP_LIMIT))
+    return catalog_ids[:limit]
+
+
+async def warm_up(module_ids: Optional[List[str]] = None) -> None:
+    """
+    Pre-parses and compiles content into this worker's caches.
+
+    Failures are recorded, not raised: a file that cannot be warmed fails
+    the same way when it is requested.
+    """
+    from app.engines.lesson_engine import aload_lesson_index
+    from app.engines.module_engine import aload_compiled_module
+    from app.engines.quiz_engine import aload_compiled_quiz, aload_public_quiz
+    from app.loaders.catalog import module_catalog
+    from app.loaders.lesson_loader import LESSON_DIR
+    from app.loaders.module_loader import aload_module_index
+
+    state.warming = True
+    started = time.perf_counter()
+    try:
+        entries = await module_catalog.arefresh()
+        if module_ids is None:
+            module_ids = _warmup_module_ids([entry["id"] for entry in entries])
+
+        jobs = []
+        for module_id in module_ids:
+            jobs.append((f"module {module_id}", lambda m=module_id: aload_module_index(m)))
+            jobs.append((f"module {module_id}", lambda m=module_id: aload_compiled_module(m)))
+        for path in sorted(QUIZ_DIR.glob("*.json")):
+            jobs.append((f"quiz {path.stem}", lambda name=path.name: aload_compiled_quiz(name)))
+            jobs.append((f"quiz {path.stem}", lambda name=path.name: aload_public_quiz(name)))
+        for path in sorted(LESSON_DIR.glob("*.json")):
+            jobs.append((f"lessons {path.stem}", lambda m=path.stem: aload_lesson_index(m)))
+
+        for name, job in jobs:
+            try:
+                await job()
+                state.warmed += 1
+            except Exception:
+                state.failed.append(name)
+            # Let queued requests run between files.
+            await asyncio.sleep(0)
+    finally:
+        state.warming = False
+        state.ready = True
+        state.record("warmup", time.perf_counter() - started)
@@ -0,0 +1 @@
+# intentionally empty
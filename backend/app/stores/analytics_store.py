@@ -0,0 +1,441 @@
+"""
+Quiz analytics storage.
+
+Scored quiz submissions are appended to a log and folded into rollups as
+they arrive, so stats are read from a few pre-aggregated counters instead
+of rescanning history. Rollups kept per quiz:
+- style: submissions per primary style,
+- question: answer histogram per question (original answer order, even
+  for shuffled submissions),
+- location: style counts per location; only locations listed in
+  ANALYTICS_LOCATIONS get their own bucket, any other is counted as
+  "other", so rollups stay bounded whatever clients send,
+- week: style counts per ISO week (UTC, e.g. "2026-W42").
+
+Requests never wait on storage: `QuizAnalytics.record()` only enqueues.
+A background thread drains the queue and appends each batch, together
+with its rollup deltas, in one transaction.
+
+Two interchangeable backends are provided:
+- InMemoryAnalyticsStore: process-local rollups only (development).
+- SQLiteAnalyticsStore: durable, WAL-mode append-only submission log with
+  rollup counters, shared by all workers using the same database.
+
+The backend is chosen once per process by `get_quiz_analytics()` from the
+ANALYTICS_BACKEND environment variable ("memory" or "sqlite").
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import AbstractSet, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.engines.quiz_engine import answer_order
+from app.metrics import ANALYTICS_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# Submissions waiting to be written; beyond this, new ones are dropped.
+DEFAULT_QUEUE_SIZE = 10_000
+
+# Writer thread: write at most this many submissions per transaction ...
+DEFAULT_BATCH_SIZE = 256
+# ... and wait at most this long for a batch to fill.
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Rollup bucket for locations outside the configured set.
+OTHER_LOCATION = "other"
+
+# (dimension, bucket, key) -> count
+RollupDelta = Counter
+
+
+@dataclass(frozen=True)
+class SubmissionRecord:
+    """
+    One scored quiz submission.
+
+    Attributes:
+        quiz_id: Quiz the answers belong to.
+        answers: Answer indices as submitted (shuffled order if `seed`).
+        primary_style: The scored primary style.
+        location: Optional location the trainee reported.
+        submitted_at: Unix timestamp.
+        seed: Shuffle seed the answers refer to, if any.
+        answer_counts: The quiz's answers per question; needed with `seed`
+            to map answers back to their original order.
+    """
+
+    quiz_id: str
+    answers: Tuple[int, ...]
+    primary_style: str
+    location: Optional[str] = None
+    submitted_at: float = 0.0
+    seed: Optional[int] = None
+    answer_counts: Tuple[int, ...] = ()
+
+    def original_answers(self) -> Tuple[int, ...]:
+        """Answer indices in the quiz file's original order."""
+        if self.seed is None:
+            return self.answers
+        order = answer_order(self.answer_counts, self.seed)
+        return tuple(order[q][shown] for q, shown in enumerate(self.answers))
+
+
+def iso_week(timestamp: float) -> str:
+    """Returns the ISO week of a Unix timestamp (UTC), e.g. "2026-W42"."""
+    return time.strftime("%G-W%V", time.gmtime(timestamp))
+
+
+def rollup_delta(records: Iterable[SubmissionRecord]) -> Dict[str, RollupDelta]:
+    """
+    Folds submissions into rollup increments, per quiz.
+
+    Returns quiz_id -> Counter of (dimension, bucket, key) -> count.
+    """
+    deltas: Dict[str, RollupDelta] = {}
+    for record in records:
+        delta = deltas.setdefault(record.quiz_id, Counter())
+        style = record.primary_style
+        delta["style", "", style] += 1
+        for question, answer in enumerate(record.original_answers()):
+            delta["question", str(question), str(answer)] += 1
+        if record.location:
+            delta["location", record.location, style] += 1
+        delta["week", iso_week(record.submitted_at), style] += 1
+    return deltas
+
+
+def format_rollup(quiz_id: str, rows: Iterable[Tuple[str, str, str, int]]) -> dict:
+    """
+    Builds the stats payload from (dimension, bucket, key, count) rows.
+
+    Its size depends on the number of styles, questions, locations and
+    weeks, never on the number of submissions.
+    """
+    styles: Dict[str, int] = {}
+    questions: Dict[int, Dict[str, int]] = {}
+    locations: Dict[str, Dict[str, int]] = {}
+    weeks: Dict[str, Dict[str, int]] = {}
+
+    for dimension, bucket, key, count in rows:
+        if dimension == "style":
+            styles[key] = count
+        elif dimension == "question":
+            questions.setdefault(int(bucket), {})[key] = count
+        elif dimension == "location":
+            locations.setdefault(bucket, {})[key] = count
+        elif dimension == "week":
+            weeks.setdefault(bucket, {})[key] = count
+
+    return {
+        "quiz_id": quiz_id,
+        "submissions": sum(styles.values()),
+        "styles": styles,
+        "questions": [
+            {"question": q, "answers": dict(sorted(questions[q].items(), key=lambda item: int(item[0])))}
+            for q in sorted(questions)
+        ],
+        "locations": dict(sorted(locations.items())),
+        "weeks": dict(sorted(weeks.items())),
+    }
+
+
+class AnalyticsStore(ABC):
+    """Interface shared by all analytics backends."""
+
+    @abstractmethod
+    def append(self, records: Sequence[SubmissionRecord]) -> None:
+        """Logs a batch of submissions and applies their rollup deltas."""
+
+    @abstractmethod
+    def stats(self, quiz_id: str) -> dict:
+        """Returns the rollups for one quiz (see `format_rollup`)."""
+
+    def close(self) -> None:
+        """Releases resources."""
+
+
+# ============================================================
+# In-memory backend
+# ============================================================
+
+class InMemoryAnalyticsStore(AnalyticsStore):
+    """
+    Process-local rollups. Submissions themselves are not kept, and each
+    worker only counts the submissions it handled.
+    """
+
+    def __init__(self):
+        self._rollups: Dict[str, RollupDelta] = {}
+        self._lock = threading.Lock()
+
+    def append(self, records: Sequence[SubmissionRecord]) -> None:
+        deltas = rollup_delta(records)
+        with self._lock:
+            for quiz_id, delta in deltas.items():
+                self._rollups.setdefault(quiz_id, Counter()).update(delta)
+
+    def stats(self, quiz_id: str) -> dict:
+        with self._lock:
+            rows = [(*key, count) for key, count in self._rollups.get(quiz_id, {}).items()]
+        return format_rollup(quiz_id, rows)
+
+
+# ============================================================
+# SQLite backend
+# ============================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz_submissions (
+    id            INTEGER PRIMARY KEY,
+    quiz_id       TEXT NOT NULL,
+    primary_style TEXT NOT NULL,
+    answers       TEXT NOT NULL,
+    location      TEXT,
+    submitted_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quiz_rollups (
+    quiz_id   TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    bucket    TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    PRIMARY KEY (quiz_id, dimension, bucket, key)
+) WITHOUT ROWID;
+"""
+
+_INSERT = """
+INSERT INTO quiz_submissions (quiz_id, primary_style, answers, location, submitted_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+_INCREMENT = """
+INSERT INTO quiz_rollups (quiz_id, dimension, bucket, key, count)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(quiz_id, dimension, bucket, key) DO UPDATE SET
+    count = count + excluded.count
+"""
+
+
+class SQLiteAnalyticsStore(AnalyticsStore):
+    """
+    Durable store backed by a SQLite database in WAL mode.
+
+    `quiz_submissions` is the append-only log (answers in original order);
+    `quiz_rollups` holds the running counters. Both are written in the same
+    transaction, so rollups always match the log, and several workers can
+    share one database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Imported here so the memory backend never loads sqlite3.
+        import sqlite3
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def append(self, records: Sequence[SubmissionRecord]) -> None:
+        if not records:
+            return
+        rows = [
+            (r.quiz_id, r.primary_style, json.dumps(r.original_answers()), r.location, r.submitted_at)
+            for r in records
+        ]
+        increments = [
+            (quiz_id, *key, count)
+            for quiz_id, delta in rollup_delta(records).items()
+            for key, count in delta.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_INSERT, rows)
+            self._conn.executemany(_INCREMENT, increments)
+
+    def stats(self, quiz_id: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dimension, bucket, key, count FROM quiz_rollups WHERE quiz_id = ?",
+                (quiz_id,),
+            ).fetchall()
+        return format_rollup(quiz_id, rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ============================================================
+# Background recorder
+# ============================================================
+
+class QuizAnalytics:
+    """
+    Queues submissions and writes them to a store in batches.
+
+    `record()` never blocks: when the queue is full the submission is
+    dropped and counted. A daemon writer thread, started on first use,
+    appends up to `batch_size` queued submissions per store call.
+    """
+
+    def __init__(
+        self,
+        store: AnalyticsStore,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        locations: AbstractSet[str] = frozenset(),
+    ):
+        self.store = store
+        # Locations tracked individually; others are logged as OTHER_LOCATION.
+        self.locations = frozenset(locations)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[SubmissionRecord]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def record(self, record: SubmissionRecord) -> bool:
+        """Enqueues a submission. Returns False if it was dropped."""
+        if record.location and record.location not in self.locations:
+            record = replace(record, location=OTHER_LOCATION)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            ANALYTICS_EVENTS.inc("dropped")
+            return False
+        return True
+
+    def stats(self, quiz_id: str) -> dict:
+        """
+        Returns the rollups for one quiz. Submissions still queued are not
+        included yet.
+        """
+        return self.store.stats(quiz_id)
+
+    def flush(self) -> None:
+        """Blocks until every submission queued so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Writes remaining submissions, stops the writer and closes the store."""
+        with self._thread_lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+        self.store.close()
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quiz-analytics", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            # Block for the first submission, then gather more until the
+            # batch is full or the flush interval has passed.
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size and items[-1] is not None:
+                try:
+                    items.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            # None is the stop marker queued by close().
+            batch = [item for item in items if item is not None]
+            stop = len(batch) != len(items)
+            self._write(batch)
+            for _ in items:
+                self._queue.task_done()
+
+    def _write(self, batch: List[SubmissionRecord]) -> None:
+        if not batch:
+            return
+        try:
+            self.store.append(batch)
+        except Exception:
+            ANALYTICS_EVENTS.inc("failed", amount=len(batch))
+            logger.exception("Failed to write %d quiz submissions", len(batch))
+        else:
+            ANALYTICS_EVENTS.inc("logged", amount=len(batch))
+
+
+# ============================================================
+# Backend selection
+# ============================================================
+
+_analytics: Optional[QuizAnalytics] = None
+_analytics_lock = threading.Lock()
+
+
+def create_analytics_store() -> AnalyticsStore:
+    """
+    Builds an analytics store from environment configuration.
+
+    ANALYTICS_BACKEND: "memory" (default) or "sqlite".
+    ANALYTICS_DB_PATH: SQLite database file (default "analytics.db").
+    """
+    backend = os.environ.get("ANALYTICS_BACKEND", "memory").lower()
+
+    if backend == "sqlite":
+        return SQLiteAnalyticsStore(os.environ.get("ANALYTICS_DB_PATH", "analytics.db"))
+    if backend == "memory":
+        return InMemoryAnalyticsStore()
+
+    raise ValueError(f"Unknown ANALYTICS_BACKEND: {backend}")
+
+
+def configured_locations() -> frozenset:
+    """
+    Locations given their own rollup bucket.
+
+    ANALYTICS_LOCATIONS: comma-separated location names (default none:
+    every reported location is counted as "other").
+    """
+    configured = os.environ.get("ANALYTICS_LOCATIONS", "")
+    return frozenset(location.strip() for location in configured.split(",") if location.strip())
+
+
+def get_quiz_analytics() -> QuizAnalytics:
+    """Returns the process-wide analytics recorder, creating it on first use."""
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = QuizAnalytics(create_analytics_store(), locations=configured_locations())
+    return _analytics
+
+
+def close_quiz_analytics() -> None:
+    """Closes the process-wide recorder if one was created."""
+    global _analytics
+    with _analytics_lock:
+        analytics, _analytics = _analytics, None
+    if analytics is not None:
+        analytics.close()
+
+
+def set_quiz_analytics(analytics: Optional[QuizAnalytics]) -> None:
+    """Replaces the process-wide recorder (e.g. to inject a custom store)."""
+    global _analytics
+    with _analytics_lock:
+        _analytics = analytics
@@ -0,0 +1,398 @@
+"""
+Session progress storage.
+
+Tracks where a trainee is within a scenario (current step index) and the
+quiz results they have produced, so clients can fetch one step at a time
+instead of downloading and replaying a whole scenario.
+
+Two interchangeable backends are provided:
+- InMemoryProgressStore: process-local, entries expire after a TTL.
+- SQLiteProgressStore: durable, WAL-mode database with batched writes;
+  entries expire after the same TTL.
+
+The active backend is chosen once per process by `get_progress_store()`
+from the PROGRESS_BACKEND environment variable ("memory" or "sqlite").
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# Sessions untouched for this long are evicted.
+DEFAULT_TTL_SECONDS = 12 * 60 * 60
+
+# SQLite backend: flush buffered writes once this many are pending ...
+DEFAULT_BATCH_SIZE = 64
+# ... or once the oldest pending write is this old.
+DEFAULT_FLUSH_INTERVAL = 1.0
+# SQLite backend: expired sessions are deleted at most this often (seconds).
+SWEEP_INTERVAL = 60.0
+
+
+@dataclass
+class SessionProgress:
+    """
+    Progress for one trainee working through one scenario.
+
+    Attributes:
+        session_id: Opaque identifier handed to the client.
+        module_id: Module the session belongs to.
+        scenario_id: Scenario within the module.
+        step_index: Index of the step the trainee is currently on.
+        quiz_results: Quiz id -> {"primary_style": ..., "breakdown": {...}}.
+        updated_at: Unix timestamp of the last change.
+    """
+
+    session_id: str
+    module_id: str
+    scenario_id: str
+    step_index: int = 0
+    quiz_results: Dict[str, dict] = field(default_factory=dict)
+    updated_at: float = field(default_factory=time.time)
+
+    def latest_quiz_result(self) -> Optional[dict]:
+        """Returns the most recently recorded quiz result, if any."""
+        if not self.quiz_results:
+            return None
+        return next(reversed(self.quiz_results.values()))
+
+    def record_quiz_result(self, quiz_id: str, result: dict) -> None:
+        """Stores a scored quiz result, making it the latest one."""
+        self.quiz_results.pop(quiz_id, None)
+        self.quiz_results[quiz_id] = {
+            "primary_style": result["primary_style"],
+            "breakdown": dict(result["breakdown"]),
+        }
+
+    def quiz_result_params(self) -> dict:
+        """
+        Returns keyword arguments for `process_step` built from the latest
+        quiz result, so quiz_result steps no longer need query parameters.
+        """
+        latest = self.latest_quiz_result()
+        if latest is None:
+            return {}
+        return {
+            "primary_style": latest["primary_style"],
+            "breakdown": latest["breakdown"],
+        }
+
+
+class ProgressStore(ABC):
+    """
+    Interface shared by all progress backends.
+
+    Backends return copies of stored sessions; callers persist changes
+    with `save()`.
+    """
+
+    def create(self, module_id: str, scenario_id: str) -> SessionProgress:
+        """Creates and stores a new session positioned at step 0."""
+        session = SessionProgress(
+            session_id=uuid.uuid4().hex,
+            module_id=module_id,
+            scenario_id=scenario_id,
+        )
+        self.save(session)
+        return session
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionProgress]:
+        """Returns a copy of the session, or None if missing or expired."""
+
+    @abstractmethod
+    def save(self, session: SessionProgress) -> None:
+        """Stores the session, refreshing its `updated_at`."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Removes the session (no-op if missing)."""
+
+    def close(self) -> None:
+        """Releases resources and persists anything still buffered."""
+
+
+def _copy(session: SessionProgress) -> SessionProgress:
+    return SessionProgress(
+        session_id=session.session_id,
+        module_id=session.module_id,
+        scenario_id=session.scenario_id,
+        step_index=session.step_index,
+        quiz_results=dict(session.quiz_results),
+        updated_at=session.updated_at,
+    )
+
+
+# ============================================================
+# In-memory backend
+# ============================================================
+
+class InMemoryProgressStore(ProgressStore):
+    """
+    Process-local store with TTL eviction.
+
+    Sessions are kept in least-recently-updated order, so expired entries
+    are always at the front and eviction never scans live sessions.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, clock=time.time):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._sessions: "OrderedDict[str, SessionProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self) -> None:
+        # Caller must hold the lock.
+        cutoff = self._clock() - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.updated_at >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[SessionProgress]:
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            return _copy(session) if session is not None else None
+
+    def save(self, session: SessionProgress) -> None:
+        session.updated_at = self._clock()
+        with self._lock:
+            self._sessions[session.session_id] = _copy(session)
+            self._sessions.move_to_end(session.session_id)
+            self._evict_expired()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired()
+            return len(self._sessions)
+
+
+# ============================================================
+# SQLite backend
+# ============================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_progress (
+    session_id   TEXT PRIMARY KEY,
+    module_id    TEXT NOT NULL,
+    scenario_id  TEXT NOT NULL,
+    step_index   INTEGER NOT NULL,
+    quiz_results TEXT NOT NULL,
+    updated_at   REAL NOT NULL
+)
+"""
+
+_INDEX = """
+CREATE INDEX IF NOT EXISTS session_progress_updated_at
+    ON session_progress (updated_at)
+"""
+
+_UPSERT = """
+INSERT INTO session_progress
+    (session_id, module_id, scenario_id, step_index, quiz_results, updated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(session_id) DO UPDATE SET
+    step_index = excluded.step_index,
+    quiz_results = excluded.quiz_results,
+    updated_at = excluded.updated_at
+"""
+
+
+class SQLiteProgressStore(ProgressStore):
+    """
+    Durable store backed by a SQLite database in WAL mode.
+
+    Writes are buffered in memory and flushed in a single transaction when
+    the buffer reaches `batch_size`, or by a timer at most `flush_interval`
+    seconds after the oldest buffered write, so other workers sharing the
+    database see changes within that bound even on an idle worker. New
+    sessions are written through immediately. Reads consult the buffer
+    first, so a session is always read back exactly as last saved. Call
+    `close()` (or `flush()`) on shutdown to persist any remaining writes.
+
+    Sessions not updated for `ttl_seconds` are treated as missing and
+    deleted by a periodic sweep during flushes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock=time.time,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+        # Imported here so the memory backend never loads sqlite3.
+        import sqlite3
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+
+        self._pending: Dict[str, Optional[SessionProgress]] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def create(self, module_id: str, scenario_id: str) -> SessionProgress:
+        # Written through, so a client's next request can land on any worker.
+        session = super().create(module_id, scenario_id)
+        self.flush()
+        return session
+
+    def get(self, session_id: str) -> Optional[SessionProgress]:
+        with self._lock:
+            if session_id in self._pending:
+                session = self._pending[session_id]
+                return _copy(session) if session is not None else None
+
+            row = self._conn.execute(
+                "SELECT session_id, module_id, scenario_id, step_index, quiz_results, updated_at "
+                "FROM session_progress WHERE session_id = ? AND updated_at >= ?",
+                (session_id, self._clock() - self.ttl_seconds),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return SessionProgress(
+            session_id=row[0],
+            module_id=row[1],
+            scenario_id=row[2],
+            step_index=row[3],
+            quiz_results=json.loads(row[4]),
+            updated_at=row[5],
+        )
+
+    def save(self, session: SessionProgress) -> None:
+        session.updated_at = self._clock()
+        self._buffer(session.session_id, _copy(session))
+
+    def delete(self, session_id: str) -> None:
+        # None marks a pending delete.
+        self._buffer(session_id, None)
+
+    def _buffer(self, session_id: str, session: Optional[SessionProgress]) -> None:
+        with self._lock:
+            self._pending[session_id] = session
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            elif self._timer is None:
+                # First write of a batch: flush it within flush_interval.
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Writes all buffered changes in one transaction."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        upserts = [
+            (
+                s.session_id,
+                s.module_id,
+                s.scenario_id,
+                s.step_index,
+                json.dumps(s.quiz_results),
+                s.updated_at,
+            )
+            for s in self._pending.values()
+            if s is not None
+        ]
+        deletes = [(sid,) for sid, s in self._pending.items() if s is None]
+
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if upserts:
+                self._conn.executemany(_UPSERT, upserts)
+            if deletes:
+                self._conn.executemany(
+                    "DELETE FROM session_progress WHERE session_id = ?", deletes
+                )
+            now = self._clock()
+            if now - self._last_sweep >= SWEEP_INTERVAL:
+                self._conn.execute(
+                    "DELETE FROM session_progress WHERE updated_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+                self._last_sweep = now
+
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+# ============================================================
+# Backend selection
+# ============================================================
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def create_progress_store() -> ProgressStore:
+    """
+    Builds a progress store from environment configuration.
+
+    PROGRESS_BACKEND: "memory" (default) or "sqlite".
+    PROGRESS_DB_PATH: SQLite database file (default "progress.db").
+    PROGRESS_TTL_SECONDS: Session lifetime (both backends).
+    """
+    backend = os.environ.get("PROGRESS_BACKEND", "memory").lower()
+    ttl = float(os.environ.get("PROGRESS_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+    if backend == "sqlite":
+        return SQLiteProgressStore(os.environ.get("PROGRESS_DB_PATH", "progress.db"), ttl_seconds=ttl)
+    if backend == "memory":
+        return InMemoryProgressStore(ttl_seconds=ttl)
+
+    raise ValueError(f"Unknown PROGRESS_BACKEND: {backend}")
+
+
+def get_progress_store() -> ProgressStore:
+    """Returns the process-wide progress store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_progress_store()
+    return _store
+
+
+def set_progress_store(store: Optional[ProgressStore]) -> None:
+    """Replaces the process-wide store (e.g. to inject a custom backend)."""
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1,22 @@
+"""
+Performance benchmarks.
+
+Benchmarks write synthetic modules and quizzes (see synthetic.py), so they
+run against a private copy of the content tree: CONTENT_DIR is pointed at a
+temporary directory before any app module is imported, and the live
+content folders are never touched, even if a run crashes. An explicit
+CONTENT_DIR is respected.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+if not os.environ.get("CONTENT_DIR"):
+    _tmp = tempfile.mkdtemp(prefix="bench-content-")
+    atexit.register(shutil.rmtree, _tmp, ignore_errors=True)
+    _content = Path(_tmp) / "content"
+    shutil.copytree(Path(__file__).resolve().parent.parent / "app" / "content", _content)
+    os.environ["CONTENT_DIR"] = str(_content)
@@ -0,0 +1,103 @@
+"""
+Load test: async content I/O vs the legacy threadpool path.
+
+Simulates a slow content directory (e.g. a stalled NFS mount) by adding a
+fixed delay to every stat/read, then drives N concurrent clients against:
+
+- legacy: a sync `def` route that opens and parses the module file on every
+  request, exactly as `get_module_scenario` did before the async loaders.
+  It runs on Starlette's threadpool, so requests queue behind its limited
+  worker count.
+- async: the real `GET /modules/{module_id}/scenario/{scenario_id}` route,
+  which awaits the async loaders (cached, coalesced, off-loop I/O).
+
+Run from the backend/ directory:
+
+    python -m benchmarks.async_io_load --clients 500 --io-latency 0.05
+
+Prints p50/p95/p99 latency (ms) and throughput for both paths as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.loaders.content_registry import registry
+from app.loaders.module_loader import MODULE_DIR
+from app.main import app
+from app.ratelimit import set_rate_limiter
+from benchmarks.harness import run_load
+
+LEGACY_PATH = "/__bench__/legacy/{module_id}/scenario/{scenario_id}"
+ASYNC_PATH = "/modules/{module_id}/scenario/{scenario_id}"
+
+
+def _install_slow_io(latency: float) -> None:
+    """Adds `latency` seconds to every registry stat and parse."""
+    original_stat = registry._stat
+    original_parse = registry._parse
+
+    def slow_stat(key):
+        time.sleep(latency)
+        return original_stat(key)
+
+    def slow_parse(key):
+        time.sleep(latency)
+        return original_parse(key)
+
+    registry._stat = slow_stat
+    registry._parse = slow_parse
+
+
+def _install_legacy_route(latency: float) -> None:
+    """Registers a sync route mirroring the pre-async scenario handler."""
+
+    def legacy_scenario(module_id: str, scenario_id: str):
+        time.sleep(latency)
+        with open(MODULE_DIR / f"{module_id}.json", "r") as f:
+            module = json.load(f)
+        scenarios = module.get("scenarios", [])
+        scenario = next((s for s in scenarios if s.get("id") == scenario_id), None)
+        return {
+            "module_id": module.get("module_id", module_id),
+            "title": module.get("title", ""),
+            "scenario": scenario,
+        }
+
+    app.add_api_route(
+        LEGACY_PATH.format(module_id="{module_id}", scenario_id="{scenario_id}"),
+        legacy_scenario,
+        methods=["GET"],
+        include_in_schema=False,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--io-latency", type=float, default=0.05, help="seconds added per stat/read")
+    parser.add_argument("--module", default="orientation")
+    parser.add_argument("--scenario", default="first_5_minutes")
+    args = parser.parse_args()
+
+    # Every simulated client shares one address; don't rate limit them.
+    set_rate_limiter(None)
+    _install_slow_io(args.io_latency)
+    _install_legacy_route(args.io_latency)
+
+    ids = {"module_id": args.module, "scenario_id": args.scenario}
+    results = {
+        "clients": args.clients,
+        "io_latency_s": args.io_latency,
+        "legacy_threadpool": asyncio.run(run_load(app, LEGACY_PATH.format(**ids), args.clients, args.requests)),
+        "async": asyncio.run(run_load(app, ASYNC_PATH.format(**ids), args.clients, args.requests)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
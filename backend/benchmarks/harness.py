@@ -0,0 +1,107 @@
+"""
+Shared measurement helpers for the benchmarks.
+
+- `measure()` times a synchronous callable (micro-benchmarks).
+- `run_load()` drives concurrent in-process ASGI clients against the app.
+
+Both return the same summary shape:
+    {"requests"/"iterations", "throughput_rps"/"ops_per_s", "p50_ms", "p95_ms", "p99_ms"}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import time
+from typing import Any, Callable, Optional
+
+import httpx
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _latency_summary(latencies: list[float]) -> dict:
+    latencies.sort()
+    # Micro-benchmarks finish in microseconds; keep enough precision.
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: Optional[int] = None) -> dict:
+    """
+    Calls `fn` repeatedly and summarizes per-call latency.
+
+    GC is paused while timing so collections triggered by earlier
+    benchmarks do not land in this one's tail.
+    """
+    for _ in range(warmup if warmup is not None else max(1, iterations // 10)):
+        fn()
+
+    latencies: list[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "iterations": iterations,
+        "ops_per_s": round(iterations / elapsed, 1),
+        **_latency_summary(latencies),
+    }
+
+
+async def run_load(
+    app,
+    url: str,
+    clients: int,
+    requests_per_client: int,
+    method: str = "GET",
+    json_body: Any = None,
+    headers: Optional[dict] = None,
+) -> dict:
+    """
+    Runs `clients` concurrent workers, each sending `requests_per_client`
+    requests to `url` through an in-process ASGI transport.
+    """
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+
+        async def worker():
+            nonlocal errors
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                response = await client.request(method, url, json=json_body)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        **_latency_summary(latencies),
+    }
@@ -0,0 +1,272 @@
+"""
+Performance benchmark suite for loaders, engines and routers.
+
+Generates synthetic content (see synthetic.py), then runs:
+
+- micro-benchmarks: loaders (cold parse and warm cache), module/quiz
+  compilation, step rendering, quiz scoring and sanitizing, catalog queries;
+- load tests: concurrent in-process ASGI clients against `app.main:app`.
+
+Every benchmark records throughput and p50/p95/p99 latency. Results are
+written as JSON and compared with a stored baseline; the run exits with
+status 1 and lists every regression when a benchmark is slower than the
+baseline by more than `--tolerance` (throughput, p50 and p95 are gated;
+p99 is recorded but too noisy to gate on).
+
+Run from the backend/ directory:
+
+    python -m benchmarks.suite                      # compare to baseline.json
+    python -m benchmarks.suite --update-baseline    # record a new baseline
+    python -m benchmarks.suite --quick --only quiz  # smaller, filtered run
+
+Baselines are machine-specific: record one on the machine (or CI runner)
+that runs the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.engines.module_engine import (
+    compile_module,
+    load_compiled_module,
+    process_step,
+    render_step,
+)
+from app.engines.quiz_engine import (
+    compile_quiz,
+    load_compiled_quiz,
+    load_public_quiz,
+    load_quiz,
+    run_quiz,
+    score_quiz,
+    score_quiz_batch,
+)
+from app.loaders.catalog import module_catalog, query_catalog
+from app.loaders.content_registry import registry
+from app.loaders.module_loader import load_module_index, load_module_json
+from app.main import app
+from app.ratelimit import set_rate_limiter
+from benchmarks.harness import measure, run_load
+from benchmarks.synthetic import SyntheticContent, random_answers
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Gated metrics: name -> True if higher is better.
+GATED_METRICS = {
+    "ops_per_s": True,
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+}
+
+DEFAULT_CONFIG = {
+    "scenarios": 10,
+    "steps": 40,
+    "questions": 20,
+    "iterations": 2000,
+    "clients": 50,
+    "requests": 20,
+}
+
+QUICK_CONFIG = {
+    "scenarios": 4,
+    "steps": 20,
+    "questions": 10,
+    "iterations": 300,
+    "clients": 10,
+    "requests": 10,
+}
+
+
+# ============================================================
+# Benchmarks
+# ============================================================
+
+def micro_benchmarks(content: SyntheticContent, batch_size: int = 100) -> Dict[str, Callable[[], object]]:
+    """Builds the micro-benchmark callables for a synthetic content set."""
+    module_id = content.module_id
+    quiz_file = content.quiz_filename
+
+    raw_module = load_module_json(module_id)
+    raw_quiz = load_quiz(quiz_file)
+    compiled_quiz = load_compiled_quiz(quiz_file)
+    compiled_scenario = load_compiled_module(module_id)[content.scenario_ids[0]]
+    first_steps = raw_module["scenarios"][0]["steps"]
+
+    answers = random_answers(content.questions)
+    batch = [random_answers(content.questions, seed=i) for i in range(batch_size)]
+    catalog_index = module_catalog.index
+
+    counter = {"step": 0}
+
+    def render_next_step():
+        counter["step"] = (counter["step"] + 1) % len(compiled_scenario)
+        return render_step(compiled_scenario, counter["step"])
+
+    def process_next_step():
+        counter["step"] = (counter["step"] + 1) % len(first_steps)
+        return process_step(first_steps[counter["step"]])
+
+    def cold_module_load():
+        registry.invalidate(content.module_path)
+        return load_module_json(module_id)
+
+    return {
+        "loader.module_json.cold": cold_module_load,
+        "loader.module_json.warm": lambda: load_module_json(module_id),
+        "loader.module_index.warm": lambda: load_module_index(module_id),
+        "engine.module.compile": lambda: compile_module(raw_module),
+        "engine.module.render_step": render_next_step,
+        "engine.module.process_step": process_next_step,
+        "engine.quiz.compile": lambda: compile_quiz(raw_quiz),
+        "engine.quiz.score": lambda: score_quiz(compiled_quiz, answers),
+        f"engine.quiz.score_batch_{batch_size}": lambda: score_quiz_batch(compiled_quiz, batch),
+        "engine.quiz.run_quiz": lambda: run_quiz(quiz_file, answers),
+        "engine.quiz.public_payload.seeded": lambda: load_public_quiz(quiz_file).payload(seed=7),
+        "loader.catalog.query": lambda: query_catalog(catalog_index, sort="duration", limit=20),
+    }
+
+
+def load_tests(content: SyntheticContent) -> Dict[str, dict]:
+    """Request specs for the in-process ASGI load tests."""
+    scenario_url = f"/modules/{content.module_id}/scenario/{content.scenario_ids[0]}"
+    return {
+        "http.get_module_scenario": {"url": scenario_url},
+        "http.get_module_scenario.gzip": {"url": scenario_url, "headers": {"Accept-Encoding": "gzip"}},
+        "http.get_scenario_step": {"url": f"{scenario_url}/step/1"},
+        "http.list_modules": {"url": "/modules"},
+        "http.get_quiz_content": {"url": f"/quiz/{content.quiz_id}/content"},
+        "http.submit_quiz": {
+            "url": f"/quiz/{content.quiz_id}",
+            "method": "POST",
+            "json_body": {"answers": random_answers(content.questions)},
+        },
+    }
+
+
+def run_suite(config: dict, only: Optional[str] = None) -> dict:
+    """Runs every (matching) benchmark and returns the results document."""
+    results: Dict[str, dict] = {}
+    # Load-test clients share one address; measure serving, not the limiter.
+    set_rate_limiter(None)
+
+    with SyntheticContent(config["scenarios"], config["steps"], config["questions"]) as content:
+        module_catalog.refresh(force=True)
+
+        for name, fn in micro_benchmarks(content).items():
+            if only and only not in name:
+                continue
+            results[name] = measure(fn, config["iterations"])
+            print(f"  {name:<40} {results[name]['p50_ms']:>10.4f} ms p50", file=sys.stderr)
+
+        for name, spec in load_tests(content).items():
+            if only and only not in name:
+                continue
+            # Warm caches so the load test measures steady-state serving.
+            asyncio.run(run_load(app, clients=1, requests_per_client=2, **spec))
+            results[name] = asyncio.run(
+                run_load(app, clients=config["clients"], requests_per_client=config["requests"], **spec)
+            )
+            print(f"  {name:<40} {results[name]['p50_ms']:>10.4f} ms p50", file=sys.stderr)
+
+    return {
+        "config": config,
+        "python": platform.python_version(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+# ============================================================
+# Baseline comparison
+# ============================================================
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Returns a description of every gated metric that regressed.
+
+    Latency regressions smaller than `min_delta_ms` in absolute terms are
+    ignored so sub-microsecond jitter cannot fail a run.
+    """
+    regressions: List[str] = []
+    for name, result in current["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        if result.get("errors"):
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        for metric, higher_is_better in GATED_METRICS.items():
+            if metric not in result or metric not in reference or not reference[metric]:
+                continue
+            now, then = result[metric], reference[metric]
+            if higher_is_better:
+                regressed = now < then / (1 + tolerance)
+            else:
+                regressed = now > then * (1 + tolerance) and now - then >= min_delta_ms
+            if regressed:
+                change = (now - then) / then * 100
+                regressions.append(f"{name}: {metric} {then} -> {now} ({change:+.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="smaller content and fewer iterations")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--output", type=Path, help="write results JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown (0.5 = 50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.005)
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key}", type=int, default=None, help=f"default {value}")
+    args = parser.parse_args(argv)
+
+    config = dict(QUICK_CONFIG if args.quick else DEFAULT_CONFIG)
+    for key in DEFAULT_CONFIG:
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+
+    current = run_suite(config, only=args.only)
+    document = json.dumps(current, indent=2) + "\n"
+
+    if args.output:
+        args.output.write_text(document, encoding="utf-8")
+    else:
+        print(document)
+
+    if args.update_baseline:
+        args.baseline.write_text(document, encoding="utf-8")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("config") != config:
+        print("Baseline was recorded with a different config; skipping comparison.", file=sys.stderr)
+        return 0
+
+    regressions = compare(current, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("\nPERFORMANCE REGRESSIONS:", file=sys.stderr)
+        for line in regressions:
+            print(f"  - {line}", file=sys.stderr)
+        return 1
+
+    print(f"No regressions against {args.baseline}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
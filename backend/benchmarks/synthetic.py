@@ -0,0 +1,131 @@
+"""
+Synthetic training content for benchmarks.
+
+Generates modules with N scenarios x M steps (a realistic mix of text,
+reflection, quiz and quiz_result steps) and personality quizzes with Q
+questions, and writes them into the content folders under a reserved
+`bench_` prefix so every router, loader and engine path is exercised
+unchanged. Those folders are a temporary copy of the content tree (see
+benchmarks/__init__.py), never the live ones. Files are removed again on
+exit.
+
+    with SyntheticContent(scenarios=20, steps=50, questions=40) as content:
+        ...  # content.module_id, content.quiz_id, content.scenario_ids
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from typing import List
+
+from app.loaders.content_registry import CONTENT_DIR, registry
+
+PREFIX = "bench_"
+
+STYLES = ("strategist", "guide", "anchor", "spark")
+
+_WORDS = (
+    "guest table menu order smile greet check pace kitchen server host "
+    "drink refill course timing section station steady calm welcome "
+    "apologize recover explain recommend notice listen follow through"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _step(rng: random.Random, position: int) -> dict:
+    kind = position % 10
+    if kind == 4:
+        return {"type": "reflection", "prompt": _sentence(rng, 14)}
+    if kind == 7:
+        return {
+            "type": "quiz",
+            "question": _sentence(rng, 12),
+            "options": [_sentence(rng, 6) for _ in range(4)],
+            "correct_index": rng.randrange(4),
+        }
+    if kind == 9:
+        return {
+            "type": "quiz_result",
+            "correct_text": _sentence(rng, 10),
+            "incorrect_text": _sentence(rng, 10),
+        }
+    return {"type": "text", "text": " ".join(_sentence(rng, 12) for _ in range(3))}
+
+
+def generate_module(module_id: str, scenarios: int, steps: int, seed: int = 0) -> dict:
+    """Builds a module with `scenarios` scenarios of `steps` steps each."""
+    rng = random.Random(seed)
+    return {
+        "id": module_id,
+        "title": f"Benchmark module {module_id}",
+        "description": _sentence(rng, 20),
+        "estimated_minutes": rng.randint(3, 30),
+        "version": "1.0",
+        "tags": ["benchmark"],
+        "scenarios": [
+            {
+                "id": f"scenario_{s}",
+                "title": f"Scenario {s}",
+                "steps": [_step(rng, i) for i in range(steps)],
+            }
+            for s in range(scenarios)
+        ],
+    }
+
+
+def generate_quiz(questions: int, seed: int = 0) -> dict:
+    """Builds a personality quiz with one answer per style per question."""
+    rng = random.Random(seed)
+    return {
+        "questions": [
+            {
+                "question": _sentence(rng, 14),
+                "answers": [{"text": _sentence(rng, 8), "style": style} for style in STYLES],
+            }
+            for _ in range(questions)
+        ]
+    }
+
+
+def random_answers(questions: int, seed: int = 0) -> List[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(len(STYLES)) for _ in range(questions)]
+
+
+class SyntheticContent:
+    """
+    Context manager that writes one synthetic module and quiz into the
+    content folders and removes them (and their cache entries) on exit.
+    """
+
+    def __init__(self, scenarios: int = 10, steps: int = 40, questions: int = 20, seed: int = 0):
+        self.scenarios = scenarios
+        self.steps = steps
+        self.questions = questions
+        self.seed = seed
+
+        self.module_id = f"{PREFIX}module"
+        self.quiz_id = f"{PREFIX}quiz"
+        self.scenario_ids = [f"scenario_{s}" for s in range(scenarios)]
+        self.module_path = CONTENT_DIR / "modules" / f"{self.module_id}.json"
+        self.quiz_path = CONTENT_DIR / "quizzes" / f"{self.quiz_id}.json"
+
+    @property
+    def quiz_filename(self) -> str:
+        return self.quiz_path.name
+
+    def __enter__(self) -> "SyntheticContent":
+        module = generate_module(self.module_id, self.scenarios, self.steps, self.seed)
+        quiz = generate_quiz(self.questions, self.seed)
+        self.module_path.write_text(json.dumps(module, indent=2), encoding="utf-8")
+        self.quiz_path.write_text(json.dumps(quiz, indent=2), encoding="utf-8")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for path in (self.module_path, self.quiz_path):
+            path.unlink(missing_ok=True)
+            registry.invalidate(path)
@@ -2,7 +2,7 @@
  * Phase 1 frontend controller for the Server Training App.
  *
  * Responsibilities:
- * - Fetch module metadata and scenarios from the backend
+ * - Fetch module metadata and stream scenarios from the backend
  * - Manage in-memory scenario progression
  * - Render step content based on step type
  *
@@ -30,25 +30,44 @@ document.addEventListener("DOMContentLoaded", () => {
 // LOAD SCENARIO FROM BACKEND
 // ============================================================
 /**
- * Fetches a scenario payload from the backend and initializes step progression.
+ * Streams a scenario from the backend and initializes step progression.
+ *
+ * Steps arrive one NDJSON line at a time from `${endpoint}/stream`, so the
+ * first step renders as soon as it arrives instead of after the whole
+ * scenario has downloaded.
  *
  * @param {string} endpoint - Backend endpoint for the scenario.
  */
 async function loadScenario(endpoint) {
     try {
-        const res = await fetch(`http://127.0.0.1:8000${endpoint}`);
+        const res = await fetch(`http://127.0.0.1:8000${endpoint}/stream`);
 
         if (!res.ok) {
             throw new Error(`Failed to load scenario: ${res.status}`);
         }
 
-        // Backend returns { module_id, title, scenario }
-        currentModule = await res.json();
+        currentModule = null;
         currentIndex = 0;
 
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split("\n");
+            buffer = lines.pop();
+
+            lines.filter(line => line.trim()).forEach(line => {
+                handleStreamMessage(JSON.parse(line));
+            });
+        }
+
         // Debug logging (safe to remove later)
         console.log("Scenario loaded:", currentModule);
-        renderStep();
     } catch (err) {
         console.error("Error loading scenario:", err);
         app.innerHTML = `
@@ -57,6 +76,42 @@ async function loadScenario(endpoint) {
     }
 }
 
+/**
+ * Applies one streamed message ({type: "meta" | "step" | "end"}).
+ */
+function handleStreamMessage(message) {
+    switch (message.type) {
+        case "meta":
+            // Same shape as the non-streaming payload: { module_id, title, scenario }
+            currentModule = {
+                module_id: message.module_id,
+                title: message.title,
+                totalSteps: message.total_steps,
+                scenario: {
+                    id: message.scenario_id,
+                    title: message.scenario_title,
+                    steps: []
+                }
+            };
+            break;
+
+        case "step":
+            currentModule.scenario.steps.push(message.step);
+            // Render as soon as the step the trainee is waiting on arrives
+            if (message.step_index === currentIndex) {
+                renderStep();
+            }
+            break;
+
+        case "end":
+            currentModule.totalSteps = currentModule.scenario.steps.length;
+            if (currentIndex >= currentModule.totalSteps) {
+                renderStep();
+            }
+            break;
+    }
+}
+
 
 // ============================================================
 // MODULE PICKER
@@ -130,6 +185,12 @@ function renderStep() {
     const steps = currentModule.scenario.steps;
     // Step progression is purely index-based (Phase 1)
 
+    if (currentIndex >= steps.length && currentIndex < currentModule.totalSteps) {
+        // Still streaming; renderStep() runs again when this step arrives
+        app.innerHTML = "<p>Loading next step...</p>";
+        return;
+    }
+
     if (currentIndex >= steps.length) {
         app.innerHTML = `
             <h2>Nice work.</h2>
@@ -170,10 +231,10 @@ function renderStep() {
 // ============================================================
 
 function renderText(step) {
-    // Simple text-based instructional step
+    // Simple text-based instructional step (processed steps use "content")
     app.innerHTML = `
         <h2>Lesson</h2>
-        <p>${step.text}</p>
+        <p>${step.content ?? step.text}</p>
         <button onclick="nextStep()">Next</button>
     `;
 }